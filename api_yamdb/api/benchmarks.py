@@ -0,0 +1,11 @@
+"""Общие функции команд замера производительности benchmark_*."""
+
+
+class Rollback(Exception):
+    """Откатывает транзакцию с данными, созданными для замера."""
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = round((len(ordered) - 1) * percent / 100)
+    return ordered[index]
@@ -0,0 +1,111 @@
+"""
+Маршрутизация запросов к базам: запись - в основную базу, чтение внутри
+GET, HEAD и OPTIONS запросов - в одну из реплик из настройки
+DATABASE_REPLICAS. Запросы на запись читают из основной базы, чтобы не
+сохранить объект, загруженный из отстающей реплики.
+
+Чтобы клиент видел свои изменения, несмотря на отставание реплик, после
+запроса на запись его чтение в течение REPLICA_PIN_SECONDS выполняется в
+основной базе. Клиент узнаётся по заголовку Authorization (метка в кэше
+REPLICA_PIN_CACHE_ALIAS) или по cookie, которую получает в ответе на запрос
+на запись. Метки видны всем воркерам, только если этот кэш общий. Внутри
+запроса, который уже что-то записал, чтение тоже идёт в основную базу.
+"""
+import hashlib
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'primary_db_until'
+PIN_CACHE_KEY = 'primary_db_until:{}'
+
+request_state = ContextVar('replica_request_state', default=None)
+
+
+class RequestState:
+    """Состояние маршрутизации одного HTTP запроса."""
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+        self.used_replica = False
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = request_state.get()
+        if (
+            not settings.DATABASE_REPLICAS
+            or state is None
+            or state.pinned
+            or state.wrote
+        ):
+            return DEFAULT_DB_ALIAS
+        state.used_replica = True
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db not in (
+            None, DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS
+        ):
+            # Связанные объекты другой базы (например, при migrate
+            # --database) записываются в неё же.
+            return instance._state.db
+        state = request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит из основной базы вместе с данными.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def get_pin_cache():
+    return caches[settings.REPLICA_PIN_CACHE_ALIAS]
+
+
+def get_pin_cache_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    return PIN_CACHE_KEY.format(
+        hashlib.sha256(authorization.encode()).hexdigest()
+    )
+
+
+def is_pinned(request):
+    """Записывал ли клиент в течение последних REPLICA_PIN_SECONDS."""
+    now = time.time()
+    try:
+        if float(request.COOKIES.get(PIN_COOKIE, 0)) > now:
+            return True
+    except ValueError:
+        pass
+    key = get_pin_cache_key(request)
+    return key is not None and get_pin_cache().get(key, 0) > now
+
+
+def pin_to_primary(request, response):
+    until = time.time() + settings.REPLICA_PIN_SECONDS
+    response.set_cookie(
+        PIN_COOKIE, f'{until:.3f}', max_age=settings.REPLICA_PIN_SECONDS,
+        httponly=True, samesite='Lax',
+    )
+    key = get_pin_cache_key(request)
+    if key is not None:
+        get_pin_cache().set(key, until, settings.REPLICA_PIN_SECONDS)
@@ -0,0 +1,205 @@
+import json
+import statistics
+import time
+from itertools import combinations
+from pathlib import Path
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from api.benchmarks import Rollback, percentile
+from api.v1.filters import TitleFilter
+from reviews.models import Review, Title, User
+
+LATENCY_TOLERANCE = 0.5
+# Рост задержки меньше этого порога считается шумом измерений.
+LATENCY_NOISE_MS = 2
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер задержки, количества SQL запросов и размера ответа основных '
+        'эндпоинтов /api/v1/ с сравнением с сохранёнными результатами'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Количество запросов к каждому эндпоинту.',
+        )
+        parser.add_argument(
+            '--baseline',
+            type=Path,
+            help='JSON файл с результатами предыдущего замера.',
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Записать результаты замера в файл --baseline.',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=LATENCY_TOLERANCE,
+            help='Допустимый относительный рост p95 задержки по сравнению '
+                 'с сохранёнными результатами.',
+        )
+
+    def get_title_filters(self, title):
+        """Все сочетания фильтров TitleFilter со значениями из базы."""
+        genre = title.genre.first()
+        values = {
+            'name': title.name[:3],
+            'category': title.category.slug if title.category else '',
+            'genre': genre.slug if genre else '',
+            'year': title.year,
+            'search': title.name.split()[0],
+        }
+        names = [name for name in TitleFilter.base_filters if name in values]
+        for size in range(1, len(names) + 1):
+            for combination in combinations(names, size):
+                yield '+'.join(combination), {
+                    name: values[name] for name in combination
+                }
+
+    def get_endpoints(self):
+        """Возвращает пары (имя эндпоинта, функция запроса к нему)."""
+        title = Title.objects.annotate(
+            review_count=Count('reviews')
+        ).order_by('-review_count').first()
+        review = Review.objects.annotate(
+            comment_count=Count('comments')
+        ).order_by('-comment_count').first()
+        user = User.objects.first()
+        client = APIClient()
+        titles_url = '/api/v1/titles/'
+        endpoints = [
+            ('titles', lambda: client.get(titles_url)),
+            ('titles?cursor', lambda: client.get(titles_url, {'cursor': ''})),
+        ]
+        for name, params in self.get_title_filters(title):
+            endpoints.append((
+                f'titles?{name}',
+                lambda params=params: client.get(titles_url, params),
+            ))
+        endpoints.append((
+            'title_detail', lambda: client.get(f'{titles_url}{title.id}/')
+        ))
+        reviews_url = f'{titles_url}{title.id}/reviews/'
+        endpoints.append(('reviews', lambda: client.get(reviews_url)))
+        if review is not None:
+            comments_url = (
+                f'{titles_url}{review.title_id}/reviews/{review.id}/comments/'
+            )
+            endpoints.append(('comments', lambda: client.get(comments_url)))
+        signups = iter(range(10 ** 9))
+
+        def signup():
+            number = next(signups)
+            return client.post('/api/v1/auth/signup/', {
+                'username': f'benchmark{number}',
+                'email': f'benchmark{number}@yamdb.fake',
+            })
+
+        endpoints.append(('signup', signup))
+        if user is not None:
+            code = default_token_generator.make_token(user)
+            endpoints.append(('token', lambda: client.post(
+                '/api/v1/auth/token/',
+                {'username': user.username, 'confirmation_code': code},
+            )))
+        return endpoints
+
+    def measure(self, request, repeat):
+        # Первый запрос прогревает кэши и в замер не входит.
+        request()
+        timings, queries, sizes = [], [], []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = request()
+                timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(
+                    f'Запрос вернул статус {response.status_code}.'
+                )
+            queries.append(len(context.captured_queries))
+            sizes.append(len(response.content))
+        return {
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'queries': max(queries),
+            'bytes': max(sizes),
+        }
+
+    def find_regressions(self, results, baseline, tolerance):
+        regressions = []
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            for metric in ('queries', 'bytes'):
+                if result[metric] > previous[metric]:
+                    regressions.append(
+                        f'{name}: {metric} {previous[metric]} -> '
+                        f'{result[metric]}'
+                    )
+            latency, previous_latency = result['p95_ms'], previous['p95_ms']
+            if (
+                latency > previous_latency * (1 + tolerance)
+                and latency - previous_latency > LATENCY_NOISE_MS
+            ):
+                regressions.append(
+                    f'{name}: p95_ms {previous_latency} -> {latency}'
+                )
+        return regressions
+
+    def handle(self, *args, **options):
+        if not Title.objects.exists():
+            raise CommandError(
+                'В базе нет произведений. Сначала выполните generate_data.'
+            )
+        results = {}
+        # Запросы на запись выполняются в транзакции, которая откатывается,
+        # а письма не отправляются, чтобы замер не менял данные. Кэш ответов
+        # выключен: иначе повторные запросы замеряли бы только его.
+        try:
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                RESPONSE_CACHE_ENABLED=False,
+            ), transaction.atomic():
+                for name, request in self.get_endpoints():
+                    results[name] = self.measure(request, options['repeat'])
+                    print(
+                        f'{name}: p50 {results[name]["p50_ms"]} мс, '
+                        f'p95 {results[name]["p95_ms"]} мс, '
+                        f'SQL {results[name]["queries"]}, '
+                        f'{results[name]["bytes"]} байт'
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+        baseline_path = options['baseline']
+        if baseline_path is None:
+            return
+        if options['save_baseline']:
+            with open(baseline_path, 'w', encoding='utf8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+            print(f'Результаты сохранены в {baseline_path}.')
+            return
+        with open(baseline_path, 'r', encoding='utf8') as file:
+            baseline = json.load(file)
+        regressions = self.find_regressions(
+            results, baseline, options['tolerance']
+        )
+        if regressions:
+            raise CommandError(
+                'Обнаружено ухудшение:\n' + '\n'.join(regressions)
+            )
+        print('Ухудшений по сравнению с сохранёнными результатами нет.')
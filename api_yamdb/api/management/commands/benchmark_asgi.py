@@ -0,0 +1,189 @@
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+
+from api.benchmarks import percentile
+from reviews.models import Comment, Title
+
+HOST = 'localhost'
+# Адреса с асинхронными view, если ASYNC_READ_URLCONF не задан.
+ASYNC_READ_URLCONF = 'api_yamdb.async_urls'
+
+
+def get_urls():
+    """Адреса чтения каталога, которые обрабатывают асинхронные view."""
+    title = Title.objects.order_by('-score_count').first()
+    if title is None:
+        raise CommandError(
+            'В базе нет произведений. Сначала выполните generate_data.'
+        )
+    urls = [
+        '/api/v1/titles/',
+        '/api/v1/titles/?page=2',
+        f'/api/v1/titles/{title.id}/',
+        '/api/v1/genres/',
+        '/api/v1/categories/',
+        f'/api/v1/titles/{title.id}/reviews/',
+    ]
+    comment = Comment.objects.select_related('review').first()
+    if comment is not None:
+        urls.append(
+            f'/api/v1/titles/{comment.review.title_id}/reviews/'
+            f'{comment.review_id}/comments/'
+        )
+    return urls
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест чтения каталога: пропускная способность и '
+        'задержка ASGI приложения с асинхронными view и WSGI приложения с '
+        'вьюсетами DRF при одинаковом числе одновременных запросов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=100,
+            help='Количество одновременных запросов (потоков для WSGI).',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=2000,
+            help='Общее количество запросов к каждому приложению.',
+        )
+        parser.add_argument(
+            '--url',
+            action='append',
+            dest='urls',
+            help='Адрес для запросов; по умолчанию - адреса каталога.',
+        )
+
+    def wsgi_request(self, application, url):
+        parts = urlsplit(url)
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': parts.path,
+            'QUERY_STRING': parts.query,
+            'SERVER_NAME': HOST,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        statuses = []
+        start = time.perf_counter()
+        response = application(
+            environ, lambda status, headers: statuses.append(status)
+        )
+        try:
+            b''.join(response)
+        finally:
+            # Закрытие ответа завершает запрос и освобождает подключения.
+            response.close()
+        return (time.perf_counter() - start) * 1000, int(statuses[0][:3])
+
+    async def asgi_request(self, application, url):
+        parts = urlsplit(url)
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': parts.path,
+            'raw_path': parts.path.encode(),
+            'query_string': parts.query.encode(),
+            'root_path': '',
+            'headers': [(b'host', HOST.encode())],
+            'server': (HOST, 80),
+            'client': ('127.0.0.1', 0),
+        }
+        body = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        statuses = []
+
+        async def receive():
+            if body:
+                return body.pop()
+            # Клиент не отключается, пока ответ не отправлен.
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        start = time.perf_counter()
+        await application(scope, receive, send)
+        return (time.perf_counter() - start) * 1000, statuses[0]
+
+    def run_wsgi(self, urls, options):
+        application = get_wsgi_application()
+        requests = [
+            urls[index % len(urls)] for index in range(options['requests'])
+        ]
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            start = time.perf_counter()
+            results = list(executor.map(
+                lambda url: self.wsgi_request(application, url), requests
+            ))
+        return time.perf_counter() - start, results
+
+    async def run_asgi(self, urls, options):
+        application = get_asgi_application()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def request(url):
+            async with semaphore:
+                return await self.asgi_request(application, url)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            request(urls[index % len(urls)])
+            for index in range(options['requests'])
+        ))
+        return time.perf_counter() - start, results
+
+    def report(self, name, elapsed, results):
+        timings = [timing for timing, _ in results]
+        errors = sum(status >= 400 for _, status in results)
+        throughput = len(results) / elapsed
+        print(
+            f'{name}: {throughput:.0f} запросов/с, '
+            f'p50 {statistics.median(timings):.2f} мс, '
+            f'p95 {percentile(timings, 95):.2f} мс, ошибок {errors}'
+        )
+        return throughput
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or get_urls()
+        # Без кэша ответов: иначе ASGI приложение отдавало бы ответы,
+        # закэшированные при замере WSGI. Асинхронные view замеряются, даже
+        # если выключены в настройках.
+        with override_settings(
+            RESPONSE_CACHE_ENABLED=False,
+            ASYNC_READ_URLCONF=(
+                settings.ASYNC_READ_URLCONF or ASYNC_READ_URLCONF
+            ),
+        ):
+            wsgi = self.report('WSGI', *self.run_wsgi(urls, options))
+            asgi = self.report(
+                'ASGI', *asyncio.run(self.run_asgi(urls, options))
+            )
+        print(f'ASGI/WSGI: {asgi / wsgi:.2f}')
@@ -0,0 +1,76 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.benchmarks import Rollback
+from api.v1.authentication import (ClaimsAccessToken,
+                                   StatelessJWTAuthentication, token_cache)
+from reviews.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение времени аутентификации и авторизованных GET запросов '
+        'с кэшем проверенных токенов и без него'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=2000,
+            help='Количество запросов в каждом замере.',
+        )
+        parser.add_argument('--url', default='/api/v1/titles/')
+
+    def measure(self, maxsize, header, options):
+        token_cache.maxsize = maxsize
+        token_cache.clear()
+        authentication = StatelessJWTAuthentication()
+        request = APIRequestFactory().get(
+            options['url'], HTTP_AUTHORIZATION=header
+        )
+        start = time.perf_counter()
+        for _ in range(options['repeat']):
+            authentication.authenticate(request)
+        authenticate_us = (
+            (time.perf_counter() - start) / options['repeat'] * 10 ** 6
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=header)
+        timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            client.get(options['url'])
+            timings.append((time.perf_counter() - start) * 1000)
+        return authenticate_us, statistics.median(timings), token_cache.stats()
+
+    def handle(self, *args, **options):
+        maxsize = token_cache.maxsize
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username='benchmark_auth',
+                    email='benchmark_auth@yamdb.fake',
+                )
+                header = f'Bearer {ClaimsAccessToken.for_user(user)}'
+                for name, size in (
+                    ('без кэша', 0), ('с кэшем', maxsize or 1)
+                ):
+                    authenticate_us, request_ms, stats = self.measure(
+                        size, header, options
+                    )
+                    print(
+                        f'{name}: аутентификация {authenticate_us:.1f} мкс, '
+                        f'GET {options["url"]} p50 {request_ms:.2f} мс, '
+                        f'попаданий в кэш {stats["hit_rate"]:.1%}'
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            token_cache.maxsize = maxsize
+            token_cache.clear()
@@ -0,0 +1,148 @@
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import percentile
+from api.sqlite import apply_pragmas
+
+SCHEMA = (
+    'CREATE TABLE review ('
+    'id INTEGER PRIMARY KEY, title_id INTEGER NOT NULL, '
+    'text TEXT NOT NULL, score INTEGER NOT NULL, pub_date REAL NOT NULL)',
+    'CREATE INDEX review_title_pub_date_idx ON review (title_id, pub_date)',
+)
+INSERT = (
+    'INSERT INTO review (title_id, text, score, pub_date) '
+    'VALUES (?, ?, ?, ?)'
+)
+# Страница отзывов произведения и их количество, как в ReviewViewSet.
+READS = (
+    'SELECT id, text, score, pub_date FROM review WHERE title_id = ? '
+    'ORDER BY pub_date LIMIT 10',
+    'SELECT COUNT(*) FROM review WHERE title_id = ?',
+)
+TITLES = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение одновременных чтения и записи в SQLite с настройками по '
+        'умолчанию и с SQLITE_PRAGMAS и постоянными подключениями'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=5,
+            help='Длительность замера каждого режима в секундах.',
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100000,
+            help='Количество отзывов в базе перед замером.',
+        )
+
+    def create_database(self, path, rows):
+        connection = sqlite3.connect(path)
+        for statement in SCHEMA:
+            connection.execute(statement)
+        randomizer = random.Random(0)
+        connection.executemany(INSERT, (
+            (randomizer.randint(1, TITLES), 'Отзыв', 5, time.time())
+            for _ in range(rows)
+        ))
+        connection.commit()
+        connection.close()
+
+    def worker(self, path, pragmas, persistent, write, stop, results):
+        """
+        Выполняет запросы до сигнала stop. Без persistent подключение
+        открывается на каждый запрос, как при CONN_MAX_AGE = 0.
+        """
+        randomizer = random.Random()
+        timings, errors = [], 0
+        connection = None
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = sqlite3.connect(path)
+                    apply_pragmas(connection, pragmas)
+                title_id = randomizer.randint(1, TITLES)
+                if write:
+                    with connection:
+                        connection.execute(
+                            INSERT, (title_id, 'Отзыв', 5, time.time())
+                        )
+                else:
+                    for query in READS:
+                        connection.execute(query, (title_id,)).fetchall()
+            except sqlite3.OperationalError:
+                errors += 1
+            else:
+                timings.append((time.perf_counter() - start) * 1000)
+            if not persistent:
+                connection.close()
+                connection = None
+        if connection is not None:
+            connection.close()
+        results.append((write, timings, errors))
+
+    def measure(self, directory, name, pragmas, persistent, options):
+        path = Path(directory) / f'{name}.sqlite3'
+        self.create_database(path, options['rows'])
+        # Режим журнала сохраняется в файле базы.
+        connection = sqlite3.connect(path)
+        apply_pragmas(connection, pragmas)
+        connection.close()
+        stop = threading.Event()
+        results = []
+        threads = [
+            threading.Thread(target=self.worker, args=(
+                path, pragmas, persistent, write, stop, results
+            ))
+            for write in (
+                [False] * options['readers'] + [True] * options['writers']
+            )
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        for write, operation in ((False, 'чтение'), (True, 'запись')):
+            timings = [
+                timing for is_write, worker_timings, _ in results
+                if is_write == write for timing in worker_timings
+            ]
+            errors = sum(
+                worker_errors for is_write, _, worker_errors in results
+                if is_write == write
+            )
+            print(
+                f'{name}, {operation}: '
+                f'{len(timings) / options["duration"]:.0f} операций/с, '
+                f'p50 {statistics.median(timings or [0]):.2f} мс, '
+                f'p95 {percentile(timings or [0], 95):.2f} мс, '
+                f'ошибок "database is locked" {errors}'
+            )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            self.measure(directory, 'по умолчанию', {}, False, options)
+            self.measure(
+                directory, 'SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS, True,
+                options,
+            )
@@ -0,0 +1,91 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.benchmarks import Rollback
+from api.v1.filters import TitleFilter
+from reviews.models import Title
+
+SYLLABLES = (
+    'ба', 'ве', 'ги', 'до', 'жу', 'за', 'ки', 'ло', 'му', 'на', 'пе', 'ри',
+    'со', 'ту', 'фа', 'хе', 'ци', 'чо', 'ша', 'эр', 'юн', 'ят', 'кро', 'стан',
+)
+VOCABULARY_SIZE = 20000
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение скорости фильтра `name` (contains) и полнотекстового '
+        'поиска `search` по произведениям'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--titles',
+            type=int,
+            default=0,
+            help='Сгенерировать столько произведений на время замера '
+                 '(по умолчанию используются данные из базы).',
+        )
+        parser.add_argument(
+            '--query',
+            action='append',
+            dest='queries',
+            help='Строка поиска; можно указать несколько раз.',
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or ['бавеги', 'кро', 'доту стан']
+        try:
+            with transaction.atomic():
+                if options['titles']:
+                    self.generate_titles(options['titles'])
+                for query in queries:
+                    self.compare(query, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def generate_titles(self, count):
+        start = time.perf_counter()
+        randomizer = random.Random(count)
+        words = [
+            ''.join(randomizer.choices(SYLLABLES, k=randomizer.randint(2, 4)))
+            for _ in range(VOCABULARY_SIZE)
+        ]
+        for offset in range(0, count, BATCH_SIZE):
+            Title.objects.bulk_create(
+                Title(
+                    name=' '.join(randomizer.choices(words, k=3)),
+                    description=' '.join(randomizer.choices(words, k=12)),
+                    year=randomizer.randint(1900, 2020),
+                )
+                for _ in range(min(BATCH_SIZE, count - offset))
+            )
+        print(
+            f'Сгенерировано {count} произведений за '
+            f'{time.perf_counter() - start:.1f} с.'
+        )
+
+    def measure(self, data, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset = TitleFilter(data, queryset=Title.objects.all()).qs
+            found = queryset.count()
+            list(queryset[:10])
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), found
+
+    def compare(self, query, repeat):
+        for param in ('name', 'search'):
+            median, found = self.measure({param: query}, repeat)
+            print(
+                f'{param}={query!r}: найдено {found}, '
+                f'медиана {median:.1f} мс'
+            )
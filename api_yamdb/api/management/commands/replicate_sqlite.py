@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api.sqlite import copy_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирование основной базы SQLite в реплики из DATABASE_REPLICAS '
+        'для локальной проверки работы с репликами'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Пауза между копированиями в секундах.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Скопировать базу один раз и завершить работу.',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Настройка DATABASE_REPLICAS пуста.')
+        for alias in (DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS):
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'База {alias} - не SQLite.')
+        try:
+            while True:
+                for alias in settings.DATABASE_REPLICAS:
+                    copy_database(DEFAULT_DB_ALIAS, alias)
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,226 @@
+"""
+Метрики запросов в формате Prometheus с агрегацией между процессами.
+
+Каждый процесс пишет свои значения в отдельный файл, отображённый в память
+(mmap), в каталоге METRICS_DIR. Эндпоинт /metrics суммирует файлы всех
+процессов, поэтому несколько воркеров gunicorn отдают общую картину.
+Расположение значений в файле определяется списками метрик и меток, а его
+отпечаток входит в имя файла: файлы с другой раскладкой не учитываются.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from itertools import product
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+PREFIX = 'yamdb_'
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'OTHER')
+STATUSES = ('2xx', '3xx', '4xx', '5xx')
+CACHE_RESULTS = ('hit', 'miss')
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+SLOT = struct.Struct('d')
+
+
+def format_value(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def get_routes():
+    """Имена маршрутов router_v1 и эндпоинтов аутентификации."""
+    from api.v1.urls import auth_urls, router_v1
+
+    return (
+        tuple(basename for _, _, basename in router_v1.registry)
+        + tuple(pattern.name for pattern in auth_urls)
+        + ('other',)
+    )
+
+
+def get_metrics():
+    """Описания метрик: имя, тип, описание, метки и границы гистограммы."""
+    return (
+        ('http_requests_total', 'counter', 'Количество запросов.',
+         ('route', 'method', 'status'), None),
+        ('http_request_duration_seconds', 'histogram',
+         'Время обработки запроса.', ('route', 'method'), DURATION_BUCKETS),
+        ('http_response_size_bytes', 'histogram', 'Размер ответа.',
+         ('route',), SIZE_BUCKETS),
+        ('db_queries_per_request', 'histogram',
+         'Количество SQL запросов на один запрос.', ('route',), QUERY_BUCKETS),
+        ('token_cache_requests_total', 'counter',
+         'Обращения к кэшу проверенных токенов.', ('result',), None),
+    )
+
+
+class MetricsRegistry:
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.lock = threading.Lock()
+        self.pid = None
+        self.file = None
+        routes = get_routes()
+        self.routes = frozenset(routes)
+        label_values = {
+            'route': routes, 'method': METHODS, 'status': STATUSES,
+            'result': CACHE_RESULTS,
+        }
+        self.metrics = get_metrics()
+        self.offsets = {}
+        size = 0
+        for name, kind, _, labels, buckets in self.metrics:
+            width = 1 if kind == 'counter' else len(buckets) + 2
+            for values in product(*(label_values[key] for key in labels)):
+                self.offsets[name, values] = size
+                size += width
+        self.size = size * SLOT.size
+        self.layout = hashlib.md5(
+            repr(self.metrics + (routes, METHODS, STATUSES, CACHE_RESULTS))
+            .encode()
+        ).hexdigest()[:8]
+
+    def get_file(self):
+        """Открывает файл текущего процесса (заново - после fork)."""
+        pid = os.getpid()
+        if self.pid != pid:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f'metrics_{self.layout}_{pid}.db'
+            with open(path, 'a+b') as file:
+                file.truncate(self.size)
+                self.file = mmap.mmap(file.fileno(), self.size)
+            self.pid = pid
+        return self.file
+
+    def add(self, offset, value):
+        file = self.get_file()
+        position = offset * SLOT.size
+        SLOT.pack_into(
+            file, position, SLOT.unpack_from(file, position)[0] + value
+        )
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.add(self.offsets[name, labels], value)
+
+    def observe(self, name, labels, value, buckets):
+        offset = self.offsets[name, labels]
+        index = next(
+            (i for i, bound in enumerate(buckets) if value <= bound),
+            len(buckets),
+        )
+        with self.lock:
+            self.add(offset + index, 1)
+            self.add(offset + len(buckets) + 1, value)
+
+    def get_route(self, url_name):
+        """
+        Имя маршрута по имени url: `titles-detail` -> `titles`,
+        `users-get-users-own-profile` -> `users`.
+        """
+        if url_name in self.routes:
+            return url_name
+        for route in self.routes:
+            if url_name and url_name.startswith(f'{route}-'):
+                return route
+        return 'other'
+
+    def record_request(self, route, method, status_code, duration,
+                       size, db_queries):
+        if method not in METHODS:
+            method = 'OTHER'
+        status = f'{status_code // 100}xx'
+        if status not in STATUSES:
+            status = '5xx'
+        self.inc('http_requests_total', (route, method, status))
+        self.observe(
+            'http_request_duration_seconds', (route, method), duration,
+            DURATION_BUCKETS,
+        )
+        self.observe(
+            'http_response_size_bytes', (route,), size, SIZE_BUCKETS
+        )
+        self.observe(
+            'db_queries_per_request', (route,), db_queries, QUERY_BUCKETS
+        )
+
+    def collect(self):
+        """Суммирует значения из файлов всех процессов."""
+        totals = [0.0] * (self.size // SLOT.size)
+        for path in self.directory.glob(f'metrics_{self.layout}_*.db'):
+            data = path.read_bytes()
+            if len(data) != self.size:
+                continue
+            for index, (value,) in enumerate(SLOT.iter_unpack(data)):
+                totals[index] += value
+        return totals
+
+    def render(self):
+        totals = self.collect()
+        lines = []
+        for name, kind, description, labels, buckets in self.metrics:
+            full_name = PREFIX + name
+            lines.append(f'# HELP {full_name} {description}')
+            lines.append(f'# TYPE {full_name} {kind}')
+            for (metric, values), offset in self.offsets.items():
+                if metric != name:
+                    continue
+                label_text = ','.join(
+                    f'{key}="{value}"' for key, value in zip(labels, values)
+                )
+                if kind == 'counter':
+                    if totals[offset]:
+                        lines.append(
+                            f'{full_name}{{{label_text}}} '
+                            f'{format_value(totals[offset])}'
+                        )
+                    continue
+                counts = totals[offset:offset + len(buckets) + 1]
+                count = sum(counts)
+                if not count:
+                    continue
+                cumulative = 0.0
+                for bound, bucket_count in zip(buckets + ('+Inf',), counts):
+                    cumulative += bucket_count
+                    lines.append(
+                        f'{full_name}_bucket{{{label_text},le="{bound}"}} '
+                        f'{format_value(cumulative)}'
+                    )
+                lines.append(
+                    f'{full_name}_sum{{{label_text}}} '
+                    f'{format_value(totals[offset + len(buckets) + 1])}'
+                )
+                lines.append(
+                    f'{full_name}_count{{{label_text}}} {format_value(count)}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry(settings.METRICS_DIR)
+    return _registry
+
+
+def metrics_view(request):
+    """Отдаёт метрики всех процессов в текстовом формате Prometheus."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    return HttpResponse(
+        get_registry().render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,495 @@
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import marshal
+import pstats
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIRequest
+from django.db import DatabaseError, connections
+from django.http import HttpResponse
+from rest_framework import serializers
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+
+from .db_router import RequestState, is_pinned, pin_to_primary, request_state
+from .metrics import get_registry
+from .response_cache import (get_response_key, load_response,
+                             store_response)
+
+logger = logging.getLogger('api.server_timing')
+slow_query_logger = logging.getLogger('api.slow_queries')
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+def check_async(middleware):
+    """
+    Переводит middleware в асинхронный режим, если следующий обработчик -
+    корутина (как MiddlewareMixin): тогда в ASGI приложении запрос не
+    занимает поток на всё время обработки.
+    """
+    if asyncio.iscoroutinefunction(middleware.get_response):
+        middleware._is_coroutine = asyncio.coroutines._is_coroutine
+
+
+class RequestMetrics:
+    """Метрики одного запроса, накапливаемые во время его обработки."""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_ms = 0.0
+        self.serializer_ms = 0.0
+        self.serializer_depth = 0
+        self.view_ms = 0.0
+        self.view_start = None
+
+    def stop_view_timer(self):
+        if self.view_start is not None:
+            self.view_ms = (time.perf_counter() - self.view_start) * 1000
+            self.view_start = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка выполнения SQL запросов (connection.execute_wrapper)."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - start) * 1000
+            self.db_queries += 1
+
+
+def instrument_serializers():
+    """
+    Оборачивает BaseSerializer.data, чтобы учитывать время сериализации.
+    Вложенные вызовы (например, to_representation через другой
+    сериализатор) учитываются один раз, во внешнем вызове.
+    """
+    original = serializers.BaseSerializer.data
+    if getattr(original.fget, 'server_timing', False):
+        return
+
+    def data(self):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return original.fget(self)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_ms += (time.perf_counter() - start) * 1000
+
+    data.server_timing = True
+    serializers.BaseSerializer.data = property(data)
+
+
+class ServerTimingMiddleware:
+    """
+    Измеряет количество и время SQL запросов, время сериализации и работы
+    view и передаёт их в заголовке Server-Timing и в строке лога
+    `api.server_timing`. Включается настройкой SERVER_TIMING_ENABLED; если
+    она выключена, Django не добавляет middleware в цепочку обработки.
+    Время view отсчитывается от process_view до возврата ответа view (до
+    рендеринга ответа DRF), поэтому middleware должен стоять последним в
+    MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrument_serializers()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        metrics.stop_view_timer()
+        total_ms = (time.perf_counter() - start) * 1000
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={metrics.db_ms:.2f};desc="{metrics.db_queries} queries"',
+            f'serializer;dur={metrics.serializer_ms:.2f}',
+            f'view;dur={metrics.view_ms:.2f}',
+            f'total;dur={total_ms:.2f}',
+        ))
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'db_queries': metrics.db_queries,
+            'db_ms': round(metrics.db_ms, 2),
+            'serializer_ms': round(metrics.serializer_ms, 2),
+            'view_ms': round(metrics.view_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_metrics.get().view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        current_metrics.get().stop_view_timer()
+        return response
+
+
+class PrometheusMetricsMiddleware:
+    """
+    Учитывает количество, время, размер ответа и число SQL запросов каждого
+    запроса в метриках маршрута (см. api.metrics). Включается настройкой
+    METRICS_ENABLED и должен стоять первым в MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.registry = get_registry()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        self.registry.record_request(
+            route=self.registry.get_route(match.url_name if match else None),
+            method=request.method,
+            status_code=response.status_code,
+            duration=duration,
+            size=0 if response.streaming else len(response.content),
+            db_queries=metrics.db_queries,
+        )
+        return response
+
+
+class QueryRecorder:
+    """Запоминает SQL запросы запроса вместе с подключением и временем."""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': self.alias,
+                'sql': sql,
+                'params': None if many else params,
+                'duration_ms': (time.perf_counter() - start) * 1000,
+            })
+
+
+def explain(alias, sql, params):
+    """План выполнения SELECT запроса (EXPLAIN QUERY PLAN для SQLite)."""
+    connection = connections[alias]
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            rows = cursor.fetchall()
+    except DatabaseError as error:
+        return [f'EXPLAIN не выполнен: {error}']
+    if connection.vendor == 'sqlite':
+        # Строки плана SQLite: (id, parent, notused, detail).
+        return [row[-1] for row in rows]
+    return [' '.join(str(column) for column in row) for row in rows]
+
+
+class SlowQueryLogMiddleware:
+    """
+    Записывает в лог `api.slow_queries` запросы, обработка которых заняла
+    больше SLOW_QUERY_THRESHOLD_MS: view, самые долгие SQL запросы и их
+    планы выполнения. Включается настройкой SLOW_QUERY_LOG_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SLOW_QUERY_LOG_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorders = [QueryRecorder(alias) for alias in connections]
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for recorder in recorders:
+                stack.enter_context(
+                    connections[recorder.alias].execute_wrapper(recorder)
+                )
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+        if total_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            queries = [
+                query for recorder in recorders for query in recorder.queries
+            ]
+            self.log(request, response, total_ms, queries)
+        return response
+
+    def get_view_name(self, request):
+        """Путь к классу view (для ViewSet - к самому ViewSet)."""
+        match = request.resolver_match
+        if match is None:
+            return None
+        view = getattr(match.func, 'cls', match.func)
+        return f'{view.__module__}.{view.__qualname__}'
+
+    def log(self, request, response, total_ms, queries):
+        slowest = sorted(
+            queries, key=lambda query: query['duration_ms'], reverse=True
+        )[:settings.SLOW_QUERY_EXPLAIN_LIMIT]
+        explained = []
+        for query in slowest:
+            plan = None
+            if (
+                query['params'] is not None
+                and query['sql'].lstrip().upper().startswith('SELECT')
+            ):
+                plan = explain(query['alias'], query['sql'], query['params'])
+            explained.append({
+                'sql': query['sql'],
+                'params': [str(param) for param in query['params'] or ()],
+                'duration_ms': round(query['duration_ms'], 2),
+                'plan': plan,
+            })
+        slow_query_logger.warning(json.dumps({
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': self.get_view_name(request),
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'db_queries': len(queries),
+            'db_ms': round(
+                sum(query['duration_ms'] for query in queries), 2
+            ),
+            'queries': explained,
+        }, ensure_ascii=False))
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос к /api/v1/ через cProfile, если в параметрах запроса
+    передан флаг PROFILING_PARAM, а пользователь - админ. Вместо ответа view
+    возвращается таблица самых долгих функций (`?profile=table`, по
+    умолчанию) или файл статистики для pstats и snakeviz (`?profile=prof`).
+    Для остальных пользователей флаг не действует. В ASGI приложении
+    профиль включает и другие запросы, обработанные в это время.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        check_async(self)
+
+    def is_admin(self, request):
+        """Аутентифицирует пользователя так же, как это сделает DRF."""
+        for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            try:
+                result = authentication().authenticate(request)
+            except APIException:
+                return False
+            if result is not None:
+                return getattr(result[0], 'is_admin', False)
+        return False
+
+    def is_requested(self, request):
+        return (
+            request.GET.get(settings.PROFILING_PARAM) is not None
+            and request.path.startswith('/api/v1/')
+        )
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.is_requested(request) or not self.is_admin(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        with profiler:
+            response = self.get_response(request)
+        return self.render_profile(request, profiler, response)
+
+    async def __acall__(self, request):
+        if not self.is_requested(request) or not await sync_to_async(
+            self.is_admin
+        )(request):
+            return await self.get_response(request)
+        profiler = cProfile.Profile()
+        with profiler:
+            response = await self.get_response(request)
+        return self.render_profile(request, profiler, response)
+
+    def render_profile(self, request, profiler, response):
+        mode = request.GET.get(settings.PROFILING_PARAM)
+        stats = pstats.Stats(profiler)
+        if mode == 'prof':
+            profile = HttpResponse(
+                marshal.dumps(stats.stats),
+                content_type='application/octet-stream',
+            )
+            profile['Content-Disposition'] = (
+                'attachment; filename="request.prof"'
+            )
+        else:
+            stream = io.StringIO()
+            stats.stream = stream
+            sort = request.GET.get('profile_sort', 'cumulative')
+            try:
+                limit = int(request.GET.get('profile_limit', ''))
+            except ValueError:
+                limit = settings.PROFILING_TOP_N
+            try:
+                stats.sort_stats(sort)
+            except KeyError:
+                stats.sort_stats('cumulative')
+            stats.print_stats(limit)
+            profile = HttpResponse(
+                stream.getvalue(), content_type='text/plain; charset=utf-8'
+            )
+        profile['X-Profiled-Status'] = response.status_code
+        return profile
+
+
+class ReplicaRouterMiddleware:
+    """
+    Передаёт ReplicaRouter состояние запроса: чтение в GET, HEAD и OPTIONS
+    запросах идёт в реплики, если клиент недавно ничего не записывал.
+    Остальные запросы читают из основной базы. После запроса, который
+    записал данные, клиент закрепляется за основной базой на
+    REPLICA_PIN_SECONDS.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        check_async(self)
+
+    def reads_primary(self, request):
+        # Запрос на запись читает из основной базы: объект, загруженный из
+        # отстающей реплики, перезаписал бы при сохранении свежие данные.
+        return request.method not in SAFE_METHODS or is_pinned(request)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        state = RequestState(pinned=self.reads_primary(request))
+        token = request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_state.reset(token)
+        if state.wrote and response.status_code < 400:
+            pin_to_primary(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        state = RequestState(pinned=await sync_to_async(
+            self.reads_primary
+        )(request))
+        token = request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_state.reset(token)
+        if state.wrote and response.status_code < 400:
+            await sync_to_async(pin_to_primary)(request, response)
+        return response
+
+
+class ResponseCacheMiddleware:
+    """
+    Отдаёт из кэша ответы на анонимные GET-запросы к каталогу (см.
+    api.response_cache). Ответы, прочитанные из реплик, не сохраняются:
+    реплика может отставать от версий таблиц.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        check_async(self)
+
+    def is_replicated(self):
+        state = request_state.get()
+        return state is not None and state.used_replica
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        key = get_response_key(request)
+        if key is None:
+            return self.get_response(request)
+        response = load_response(key)
+        if response is None:
+            response = self.get_response(request)
+            if not self.is_replicated():
+                store_response(key, response)
+        return response
+
+    async def __acall__(self, request):
+        key = await sync_to_async(
+            get_response_key, thread_sensitive=False
+        )(request)
+        if key is None:
+            return await self.get_response(request)
+        response = await sync_to_async(
+            load_response, thread_sensitive=False
+        )(key)
+        if response is None:
+            response = await self.get_response(request)
+            if not self.is_replicated():
+                await sync_to_async(
+                    store_response, thread_sensitive=False
+                )(key, response)
+        return response
+
+
+class AsyncReadMiddleware:
+    """
+    Направляет запросы ASGI приложения в ASYNC_READ_URLCONF, где чтение
+    каталога обрабатывают асинхронные view. Запросы WSGI приложения
+    обрабатываются по ROOT_URLCONF.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'ASYNC_READ_URLCONF', None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        check_async(self)
+
+    def __call__(self, request):
+        # В асинхронном режиме возвращает корутину следующего обработчика.
+        if isinstance(request, ASGIRequest):
+            request.urlconf = settings.ASYNC_READ_URLCONF
+        return self.get_response(request)
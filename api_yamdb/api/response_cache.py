@@ -0,0 +1,169 @@
+"""
+Кэш ответов на анонимные GET-запросы к каталогу.
+
+Ключ ответа строится из хоста, адреса с параметрами, заголовка Accept,
+способа аутентификации и версий таблиц, от которых зависит ответ маршрута
+(DEPENDENCIES). После фиксации транзакции, изменившей запись одной из этих
+таблиц, её версия заменяется новой (сигналы моделей), поэтому ответы со
+старыми данными больше не находятся и вытесняются по RESPONSE_CACHE_TIMEOUT.
+
+Версии и ответы хранятся в кэше RESPONSE_CACHE_ALIAS. Кэш в памяти процесса
+подходит для одного процесса; чтобы несколько воркеров видели одни и те же
+версии, нужен общий кэш - файловый или в базе данных.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleGenre, User)
+from reviews.signals import bulk_changed
+
+VERSION_KEY = 'response_cache:version:{}'
+RESPONSE_KEY = 'response_cache:response:{}'
+# Модели, от которых зависят ответы маршрутов router_v1.
+DEPENDENCIES = {
+    'categories': (Category,),
+    'genres': (Genre,),
+    # Рейтинг произведения меняется вместе с его отзывами.
+    'titles': (Title, Category, Genre, TitleGenre, Review),
+    'reviews': (Review, Title, User),
+    'comments': (Comment, Review, User),
+}
+CACHED_MODELS = frozenset(
+    model for models in DEPENDENCIES.values() for model in models
+)
+CACHED_ACTIONS = ('list', 'detail')
+# Заголовки, которые относятся к одному ответу и не кэшируются.
+SKIPPED_HEADERS = frozenset(('server-timing', 'x-profiled-status'))
+CACHE_HEADER = 'X-Response-Cache'
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_version_key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def new_version():
+    # Случайная версия вместо счётчика: одновременные изменения в разных
+    # процессах не могут вернуть уже использованное значение.
+    return uuid.uuid4().hex
+
+
+def bump_versions(*models):
+    """Меняет версии таблиц моделей: их ответы в кэше больше не находятся."""
+    get_cache().set_many(
+        {get_version_key(model): new_version() for model in models}, None
+    )
+
+
+def get_versions(models):
+    cache = get_cache()
+    keys = [get_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # Версия, вытесненная из кэша, заменяется новой, а не начальной,
+        # чтобы не найти ответы, сохранённые до вытеснения.
+        for key in missing:
+            cache.add(key, new_version(), None)
+        versions.update(cache.get_many(missing))
+    return [str(versions.get(key)) for key in keys]
+
+
+def get_auth_key(request):
+    """
+    Способ аутентификации запроса. Кэшируются только анонимные запросы:
+    токен нужно проверить, а ответ на запрос с неверным токеном - 401.
+    """
+    if request.META.get('HTTP_AUTHORIZATION'):
+        return None
+    return 'anonymous'
+
+
+def get_response_key(request):
+    """Ключ ответа в кэше или None, если ответ на запрос не кэшируется."""
+    if not settings.RESPONSE_CACHE_ENABLED or request.method != 'GET':
+        return None
+    auth = get_auth_key(request)
+    if auth is None:
+        return None
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return None
+    route, _, action = (match.url_name or '').rpartition('-')
+    if route not in DEPENDENCIES or action not in CACHED_ACTIONS:
+        return None
+    # Маршрут нужен метрикам и при ответе из кэша.
+    request.resolver_match = match
+    raw = '\n'.join((
+        request.get_host(),
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+        auth,
+        *get_versions(DEPENDENCIES[route]),
+    ))
+    return RESPONSE_KEY.format(hashlib.sha256(raw.encode()).hexdigest())
+
+
+def load_response(key):
+    cached = get_cache().get(key)
+    if cached is None:
+        return None
+    status, content, headers = cached
+    response = HttpResponse(content, status=status)
+    for name, value in headers:
+        response[name] = value
+    response[CACHE_HEADER] = 'hit'
+    return response
+
+
+def store_response(key, response):
+    if (
+        response.status_code != 200
+        or response.streaming
+        or response.cookies
+    ):
+        return
+    headers = [
+        (name, value) for name, value in response.items()
+        if name.lower() not in SKIPPED_HEADERS
+    ]
+    get_cache().set(
+        key, (response.status_code, response.content, headers),
+        settings.RESPONSE_CACHE_TIMEOUT,
+    )
+    response[CACHE_HEADER] = 'miss'
+
+
+def forget_responses(sender, using=None, **kwargs):
+    """
+    Ответы, зависящие от изменённой таблицы, перестают находиться после
+    фиксации транзакции.
+    """
+    if kwargs.get('action', 'post_').startswith('post_'):
+        transaction.on_commit(lambda: bump_versions(sender), using=using)
+
+
+def connect_signals():
+    # Обработчики подключаются к конкретным моделям: обработчик post_delete
+    # без sender отключил бы быстрое удаление для всех моделей.
+    for model in CACHED_MODELS:
+        uid = f'response_cache_{model._meta.label_lower}'
+        if model is TitleGenre:
+            m2m_changed.connect(
+                forget_responses, sender=model, dispatch_uid=uid
+            )
+        post_save.connect(forget_responses, sender=model, dispatch_uid=uid)
+        post_delete.connect(forget_responses, sender=model, dispatch_uid=uid)
+        bulk_changed.connect(forget_responses, sender=model, dispatch_uid=uid)
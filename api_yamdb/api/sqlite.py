@@ -0,0 +1,48 @@
+"""
+Настройка подключений к SQLite для работы под нагрузкой.
+
+При каждом новом подключении выполняются PRAGMA из настройки SQLITE_PRAGMAS:
+журнал WAL позволяет читать базу во время записи, synchronous=NORMAL
+сокращает количество fsync, mmap_size и cache_size уменьшают чтение с
+диска, busy_timeout заставляет ждать снятия блокировки вместо ошибки
+"database is locked". Вместе с CONN_MAX_AGE подключение и его настройки
+переиспользуются между запросами.
+"""
+import sqlite3
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def apply_pragmas(connection, pragmas):
+    """Выполняет PRAGMA на подключении DB-API к SQLite."""
+    cursor = connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    apply_pragmas(connection.connection, settings.SQLITE_PRAGMAS)
+
+
+def copy_database(source_alias, target_alias):
+    """
+    Копирует базу SQLite source_alias в файл базы target_alias через
+    backup API. Заменяет репликацию при локальной проверке работы с
+    репликами.
+    """
+    source = connections[source_alias]
+    source.ensure_connection()
+    target = sqlite3.connect(connections[target_alias].settings_dict['NAME'])
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
@@ -0,0 +1,32 @@
+from django.urls import path
+
+from .async_views import (CategoryAsyncView, CommentAsyncView,
+                          GenreAsyncView, ReviewAsyncView, TitleAsyncView)
+
+# Адреса и имена совпадают с маршрутами router_v1: остальные запросы к ним
+# передаются синхронным вьюсетам.
+REVIEWS = 'titles/<int:title_id>/reviews/'
+COMMENTS = f'{REVIEWS}<int:review_id>/comments/'
+
+urlpatterns = [
+    path(
+        'categories/', CategoryAsyncView.as_view('list'),
+        name='categories-list',
+    ),
+    path('genres/', GenreAsyncView.as_view('list'), name='genres-list'),
+    path('titles/', TitleAsyncView.as_view('list'), name='titles-list'),
+    path(
+        'titles/<int:pk>/', TitleAsyncView.as_view('retrieve'),
+        name='titles-detail',
+    ),
+    path(REVIEWS, ReviewAsyncView.as_view('list'), name='reviews-list'),
+    path(
+        f'{REVIEWS}<int:pk>/', ReviewAsyncView.as_view('retrieve'),
+        name='reviews-detail',
+    ),
+    path(COMMENTS, CommentAsyncView.as_view('list'), name='comments-list'),
+    path(
+        f'{COMMENTS}<int:pk>/', CommentAsyncView.as_view('retrieve'),
+        name='comments-detail',
+    ),
+]
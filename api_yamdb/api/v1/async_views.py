@@ -0,0 +1,250 @@
+"""
+Асинхронные реализации чтения каталога для ASGI приложения.
+
+GET запросы к произведениям, жанрам, категориям, отзывам и комментариям
+обрабатываются без блокировки цикла событий: независимые SQL запросы
+(страница и COUNT(*), произведение и его жанры, проверка родительского
+объекта) выполняются одновременно в пуле потоков, каждый на своём
+подключении к базе. Аутентификация, права, фильтры, сериализаторы и формат
+ответа берутся из вьюсетов DRF, поэтому ответы совпадают с синхронными.
+Остальные запросы (запись, курсорная пагинация) передаются синхронным
+вьюсетам из ROOT_URLCONF.
+"""
+import asyncio
+import sys
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db import close_old_connections
+from django.shortcuts import get_object_or_404
+from django.urls import resolve
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from reviews.models import Comment, Genre, Review, Title
+
+from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
+                    ReviewViewSet, TitleViewSet)
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+def database_call(func):
+    """
+    Выполняет синхронную функцию с запросами к базе в пуле потоков, чтобы
+    несколько таких вызовов шли одновременно. Подключения потока
+    проверяются так же, как в начале и конце HTTP запроса.
+    """
+    @wraps(func)
+    def call(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(call, thread_sensitive=False)
+
+
+def set_prefetched(instance, name, objects):
+    """Кладёт загруженные объекты связи в кэш prefetch_related."""
+    queryset = getattr(instance, name).all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    instance.__dict__.setdefault('_prefetched_objects_cache', {})[name] = (
+        queryset
+    )
+
+
+class AsyncReadView:
+    """
+    Асинхронное чтение для маршрута вьюсета viewset_class. Подклассы
+    реализуют действия `list` и `retrieve` как корутины, возвращающие
+    данные ответа.
+    """
+    viewset_class = None
+
+    def __init__(self, action):
+        self.action = action
+
+    @classmethod
+    def as_view(cls, action):
+        async def view(request, *args, **kwargs):
+            return await cls(action).dispatch(request, *args, **kwargs)
+
+        view.cls = cls
+        # CSRF проверяют вьюсеты DRF, которым передаётся запись.
+        view.csrf_exempt = True
+        return view
+
+    def is_async(self, request):
+        return (
+            request.method in READ_METHODS
+            and 'cursor' not in request.GET
+        )
+
+    async def fallback(self, request, *args, **kwargs):
+        """Передаёт запрос синхронному вьюсету того же адреса."""
+        match = resolve(request.path_info, urlconf=settings.ROOT_URLCONF)
+        return await sync_to_async(match.func)(
+            request, *match.args, **match.kwargs
+        )
+
+    def get_viewset(self, request, kwargs):
+        viewset = self.viewset_class()
+        viewset.action_map = {'get': self.action}
+        viewset.action = self.action
+        viewset.args = ()
+        viewset.kwargs = kwargs
+        viewset.format_kwarg = None
+        viewset.request = viewset.initialize_request(request, **kwargs)
+        viewset.headers = viewset.default_response_headers
+        return viewset
+
+    async def dispatch(self, request, *args, **kwargs):
+        if not self.is_async(request):
+            return await self.fallback(request, *args, **kwargs)
+        viewset = self.get_viewset(request, kwargs)
+        self.viewset = viewset
+        self.request = viewset.request
+        try:
+            # Аутентификация может обратиться к базе (устаревшие токены).
+            await database_call(viewset.initial)(self.request, **kwargs)
+            response = Response(await getattr(self, self.action)())
+        except Exception as error:
+            response = viewset.handle_exception(error)
+        return viewset.finalize_response(
+            self.request, response, *args, **kwargs
+        )
+
+    async def paginate(self, queryset):
+        """
+        Страница queryset в формате пагинатора вьюсета. Количество записей
+        и сама страница запрашиваются одновременно.
+        """
+        paginator = self.viewset.paginator
+        page_size = paginator.get_page_size(self.request)
+        django_paginator = paginator.django_paginator_class(
+            queryset, page_size
+        )
+        number = self.request.query_params.get(
+            paginator.page_query_param, 1
+        )
+        try:
+            if number in paginator.last_page_strings:
+                django_paginator.count = await database_call(
+                    queryset.count
+                )()
+                number = django_paginator.num_pages
+                objects = await database_call(self.get_page_objects)(
+                    queryset, number, page_size
+                )
+            else:
+                # Номер проверяется до запросов, кроме сравнения с
+                # количеством страниц, которое станет известно с COUNT(*).
+                number = self.validate_number(number, page_size)
+                django_paginator.count, objects = await asyncio.gather(
+                    database_call(queryset.count)(),
+                    database_call(self.get_page_objects)(
+                        queryset, number, page_size
+                    ),
+                )
+            paginator.page = Page(
+                objects, django_paginator.validate_number(number),
+                django_paginator,
+            )
+        except InvalidPage as error:
+            raise NotFound(paginator.invalid_page_message.format(
+                page_number=number, message=str(error)
+            ))
+        paginator.request = self.request
+        data = self.viewset.get_serializer(objects, many=True).data
+        return paginator.get_paginated_response(data).data
+
+    def validate_number(self, number, page_size):
+        paginator = Paginator((), page_size)
+        paginator.count = sys.maxsize
+        return paginator.validate_number(number)
+
+    def get_page_objects(self, queryset, number, page_size):
+        bottom = (number - 1) * page_size
+        return list(queryset[bottom:bottom + page_size])
+
+    def serialize(self, instance):
+        self.viewset.check_object_permissions(self.request, instance)
+        return self.viewset.get_serializer(instance).data
+
+
+class CategoryAsyncView(AsyncReadView):
+    viewset_class = CategoryViewSet
+
+    async def list(self):
+        return await self.paginate(
+            self.viewset.filter_queryset(self.viewset.get_queryset())
+        )
+
+
+class GenreAsyncView(CategoryAsyncView):
+    viewset_class = GenreViewSet
+
+
+class TitleAsyncView(CategoryAsyncView):
+    viewset_class = TitleViewSet
+
+    async def retrieve(self):
+        """Произведение с категорией и его жанры загружаются одновременно."""
+        pk = self.viewset.kwargs['pk']
+        title, genres = await asyncio.gather(
+            database_call(get_object_or_404)(
+                Title.objects.select_related('category'), pk=pk
+            ),
+            database_call(list)(Genre.objects.filter(title=pk)),
+        )
+        set_prefetched(title, 'genre', genres)
+        return self.serialize(title)
+
+
+class ReviewAsyncView(AsyncReadView):
+    viewset_class = ReviewViewSet
+
+    def get_queryset(self):
+        return Review.objects.filter(
+            title_id=self.viewset.kwargs['title_id']
+        ).select_related('author')
+
+    def check_parent(self):
+        get_object_or_404(Title, pk=self.viewset.kwargs['title_id'])
+
+    async def list(self):
+        """Родитель проверяется одновременно с загрузкой страницы."""
+        data, _ = await asyncio.gather(
+            self.paginate(self.get_queryset()),
+            database_call(self.check_parent)(),
+        )
+        return data
+
+    async def retrieve(self):
+        # Отзыв с id произведения из адреса существует, только если
+        # существует и само произведение.
+        instance = await database_call(get_object_or_404)(
+            self.get_queryset(), pk=self.viewset.kwargs['pk']
+        )
+        return self.serialize(instance)
+
+
+class CommentAsyncView(ReviewAsyncView):
+    viewset_class = CommentViewSet
+
+    def get_queryset(self):
+        kwargs = self.viewset.kwargs
+        return Comment.objects.filter(
+            review_id=kwargs['review_id'],
+            review__title_id=kwargs['title_id'],
+        ).select_related('author').order_by('-pub_date', '-id')
+
+    def check_parent(self):
+        kwargs = self.viewset.kwargs
+        get_object_or_404(
+            Review, pk=kwargs['review_id'], title_id=kwargs['title_id']
+        )
@@ -0,0 +1,179 @@
+"""
+Аутентификация по JWT без загрузки пользователя из базы.
+
+Токен, выданный get_token, содержит username, роль и права пользователя,
+поэтому проверки разрешений выполняются по claims. Версия токенов
+пользователя хранится в кэше: после смены роли, прав или отзыва токенов
+она увеличивается, и токены с прежней версией отклоняются.
+
+Разобранные и проверенные токены хранятся в LRU кэше процесса до истечения
+срока действия, поэтому подпись повторно используемого токена не
+проверяется на каждом запросе.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.metrics import get_registry
+from api_yamdb.settings import ADMIN, MODERATOR
+from reviews.models import TOKEN_VERSION_CACHE_KEY, User
+
+CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+VERSION_CLAIM = 'ver'
+
+
+class ClaimsAccessToken(AccessToken):
+    """Токен доступа с ролью, правами и версией токенов пользователя."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in CLAIMS:
+            token[claim] = getattr(user, claim)
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, данные которого берутся из claims токена."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    @property
+    def is_admin(self):
+        return self.role == ADMIN or self.is_superuser or self.is_staff
+
+    @property
+    def is_moderator(self):
+        return self.role == MODERATOR
+
+
+def get_token_version(user_id):
+    """Текущая версия токенов пользователя или None, если его нет."""
+    key = TOKEN_VERSION_CACHE_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        if version is None:
+            return None
+        cache.set(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+class TokenCache:
+    """Ограниченный по размеру LRU кэш проверенных токенов."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.tokens = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, raw_token):
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        return hashlib.sha256(raw_token).digest()
+
+    def get(self, raw_token):
+        key = self.get_key(raw_token)
+        with self.lock:
+            token = self.tokens.get(key)
+            if token is not None and token['exp'] <= time.time():
+                del self.tokens[key]
+                token = None
+            if token is None:
+                self.misses += 1
+            else:
+                self.tokens.move_to_end(key)
+                self.hits += 1
+        if settings.METRICS_ENABLED:
+            get_registry().inc(
+                'token_cache_requests_total',
+                ('miss' if token is None else 'hit',),
+            )
+        return token
+
+    def set(self, raw_token, token):
+        key = self.get_key(raw_token)
+        with self.lock:
+            self.tokens[key] = token
+            self.tokens.move_to_end(key)
+            while len(self.tokens) > self.maxsize:
+                self.tokens.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.tokens.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            'size': len(self.tokens),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+        }
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
+
+
+def get_db_user(user):
+    """Запись пользователя из базы для запросов, которым её недостаточно."""
+    if isinstance(user, ClaimsUser):
+        return get_object_or_404(User, pk=user.id)
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Возвращает ClaimsUser вместо загрузки пользователя из базы. Токены без
+    claims (выданные AccessToken.for_user) проверяются по базе, как в
+    JWTAuthentication. Проверенные токены берутся из token_cache, если
+    TOKEN_CACHE_SIZE больше нуля.
+    """
+
+    def get_validated_token(self, raw_token):
+        if not token_cache.maxsize:
+            return super().get_validated_token(raw_token)
+        token = token_cache.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            token_cache.set(raw_token, token)
+        return token
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            user = super().get_user(validated_token)
+            if user.token_version:
+                raise AuthenticationFailed(
+                    'Токен отозван.', code='token_revoked'
+                )
+            return user
+        version = get_token_version(
+            validated_token[api_settings.USER_ID_CLAIM]
+        )
+        if version is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден.', code='user_not_found'
+            )
+        if version != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed('Токен отозван.', code='token_revoked')
+        return ClaimsUser(validated_token)
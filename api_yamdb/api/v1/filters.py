@@ -1,14 +1,51 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
 from django_filters import filters
 from django_filters.rest_framework import FilterSet
 
 from reviews.models import Title
 
+TITLE_FTS_TABLE = 'reviews_title_fts'
+
+
+def build_fts_query(value):
+    """Превращает строку поиска в запрос FTS5 с поиском по префиксам."""
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', value))
+
 
 class TitleFilter(FilterSet):
     name = filters.CharFilter(field_name='name', lookup_expr='contains')
     genre = filters.CharFilter(field_name='genre__slug')
     category = filters.CharFilter(field_name='category__slug')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = ('name', 'category', 'genre', 'year')
+
+    def filter_search(self, queryset, name, value):
+        """
+        Полнотекстовый поиск по названию и описанию с сортировкой по
+        релевантности. Использует индекс FTS5, если база данных - SQLite.
+        """
+        query = build_fts_query(value)
+        if not query:
+            return queryset
+        if connections[queryset.db].vendor != 'sqlite':
+            return queryset.filter(
+                Q(name__icontains=value) | Q(description__icontains=value)
+            )
+        title_table = Title._meta.db_table
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {TITLE_FTS_TABLE} '
+            f'WHERE {TITLE_FTS_TABLE} MATCH %s',
+            (query,),
+        )).annotate(search_rank=RawSQL(
+            f'SELECT rank FROM {TITLE_FTS_TABLE} '
+            f'WHERE {TITLE_FTS_TABLE} MATCH %s '
+            f'AND rowid = {title_table}.id',
+            (query,),
+        )).order_by('search_rank', 'id')
@@ -0,0 +1,52 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Постраничная пагинация, которая переключается на курсорную, если в
+    запросе передан параметр `cursor` (для первой страницы - `?cursor=`).
+    Курсорный режим не выполняет COUNT(*) и OFFSET по всей таблице.
+    """
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('id',)
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def get_cursor_paginator(self):
+        paginator = CursorPagination()
+        paginator.cursor_query_param = self.cursor_query_param
+        paginator.ordering = self.cursor_ordering
+        paginator.page_size = self.page_size
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.get_cursor_paginator()
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_html_context()
+        return super().get_html_context()
+
+
+class TitlePagination(OptionalCursorPagination):
+    cursor_ordering = ('name', 'id')
+
+
+class PubDatePagination(OptionalCursorPagination):
+    cursor_ordering = ('pub_date', 'id')
+
+
+class CommentPagination(OptionalCursorPagination):
+    # Новые комментарии первыми, как и в постраничном режиме.
+    cursor_ordering = ('-pub_date', '-id')
@@ -39,5 +39,5 @@ class IsAdminModeratorAuthorOrReadOnly(permissions.BasePermission):
             request.method in permissions.SAFE_METHODS
             or request.user.is_moderator
             or request.user.is_admin
-            or request.user == obj.author
+            or obj.author_id == request.user.id
         )
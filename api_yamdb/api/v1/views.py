@@ -1,21 +1,23 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
 from django.db import IntegrityError
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import status, viewsets
+from rest_framework import serializers, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.filters import SearchFilter
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import (IsAuthenticated, AllowAny)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Title, User, Review
-from .viewsets import CreateListDeleteViewSet
+from rest_framework.settings import api_settings
+from reviews.models import (CONFIRMATION_CODE_PLACEHOLDER, Category, Genre,
+                            OutgoingEmail, Title, User, Review)
+from .viewsets import CreateListDeleteViewSet, ParentObjectMixin
 
 from api_yamdb.settings import DEFAULT_FROM_EMAIL
+from .authentication import ClaimsAccessToken, get_db_user
 from .filters import TitleFilter
+from .pagination import (CommentPagination, PubDatePagination,
+                         TitlePagination)
 from .permissions import (
     IsSuperUserOrIsAdminOnly,
     IsAdminOrReadOnly,
@@ -39,7 +41,8 @@ from .serializers import (
 @permission_classes([AllowAny])
 def signup(request):
     """
-    Добавляет нового пользователя. Отправляет код подтверждения на почту.
+    Добавляет нового пользователя. Ставит письмо с кодом подтверждения в
+    очередь на отправку (команда send_emails).
     """
     serializer = SignupSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -62,12 +65,12 @@ def signup(request):
         return Response(
             error_response,
             status.HTTP_400_BAD_REQUEST)
-    confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    OutgoingEmail.objects.create(
         subject='Регистрация в YaMDb',
-        message=f'Ваш проверочный код: {confirmation_code}',
+        body=f'Ваш проверочный код: {CONFIRMATION_CODE_PLACEHOLDER}',
         from_email=DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email]
+        recipient=user.email,
+        user=user,
     )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -85,7 +88,7 @@ def get_token(request):
         user, serializer.validated_data.get('confirmation_code')
     ):
         return Response(
-            {'token': str(AccessToken.for_user(user))},
+            {'token': str(ClaimsAccessToken.for_user(user))},
             status=status.HTTP_200_OK)
     return Response(
         {'confirmation_code': 'Некорректный код подтверждения'},
@@ -113,7 +116,7 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def get_users_own_profile(self, request):
         """Получает информацию о пользователе и может редактировать её."""
-        user = request.user
+        user = get_db_user(request.user)
         if request.method == 'PATCH':
             serializer = self.get_serializer(
                 user, data=request.data, partial=True
@@ -139,12 +142,14 @@ class GenreViewSet(CreateListDeleteViewSet):
 
 class TitleViewSet(viewsets.ModelViewSet):
     """Вьюсет произведений."""
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
+    queryset = (
+        Title.objects.select_related('category').prefetch_related('genre')
+    )
     serializer_class = TitleSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
-    pagination_class = PageNumberPagination
+    pagination_class = TitlePagination
     http_method_names = ['get', 'post', 'patch', 'delete']
 
     def get_serializer_class(self):
@@ -153,43 +158,58 @@ class TitleViewSet(viewsets.ModelViewSet):
         return TitleCreateSerializer
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ParentObjectMixin, viewsets.ModelViewSet):
     """Вьюсет комментариев."""
     serializer_class = CommentSerializer
     permission_classes = (IsAdminModeratorAuthorOrReadOnly,)
-    pagination_class = PageNumberPagination
+    pagination_class = CommentPagination
     http_method_names = ['get', 'post', 'patch', 'delete', ]
-
-    def get_review(self):
-        return get_object_or_404(Review, pk=self.kwargs.get('review_id'),
-                                 title_id=self.kwargs.get('title_id'))
+    parent_lookups = {
+        'review': (Review, {'pk': 'review_id', 'title_id': 'title_id'}),
+    }
 
     def get_queryset(self):
         return (
-            self.get_review()
+            self.get_parent('review')
             .comments.select_related('author')
-            .order_by('-pub_date')
+            .order_by('-pub_date', '-id')
         )
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(
+            author_id=self.request.user.id, review=self.get_parent('review')
+        )
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ParentObjectMixin, viewsets.ModelViewSet):
     """Вьюсет отзывов."""
     serializer_class = ReviewSerializer
     permission_classes = (IsAdminModeratorAuthorOrReadOnly,)
-    pagination_class = PageNumberPagination
+    pagination_class = PubDatePagination
     http_method_names = ['get', 'post', 'patch', 'delete']
-
-    def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+    parent_lookups = {'title': (Title, {'pk': 'title_id'})}
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.get_parent('title').reviews.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            title=self.get_title()
-        )
+        """
+        Повторный отзыв отклоняет ограничение reviews_review_unique_review,
+        поэтому отдельная проверка перед вставкой не нужна и гонка
+        одновременных запросов невозможна.
+        """
+        title = self.get_parent('title')
+        try:
+            # Review.save выполняется в транзакции, которая откатывается
+            # при нарушении ограничения.
+            serializer.save(author_id=self.request.user.id, title=title)
+        except IntegrityError:
+            if not Review.objects.filter(
+                author_id=self.request.user.id, title=title
+            ).exists():
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже оставляли отзыв на это произведение.'
+                ]
+            })
@@ -1,3 +1,5 @@
+from django.shortcuts import get_object_or_404
+from django.utils.functional import SimpleLazyObject
 from rest_framework import mixins, viewsets
 from rest_framework.filters import SearchFilter
 
@@ -14,3 +16,31 @@ class CreateListDeleteViewSet(
     filter_backends = (SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+
+
+class ParentObjectMixin:
+    """
+    Загружает родительские объекты вложенного маршрута (произведение,
+    отзыв) один раз за запрос и передаёт их в контекст сериализатора.
+    parent_lookups: имя объекта -> (модель, {поле модели: имя kwarg url}).
+    """
+    parent_lookups = {}
+
+    def get_parent(self, name):
+        parents = self.__dict__.setdefault('_parents', {})
+        if name not in parents:
+            model, lookups = self.parent_lookups[name]
+            parents[name] = get_object_or_404(model, **{
+                field: self.kwargs.get(kwarg)
+                for field, kwarg in lookups.items()
+            })
+        return parents[name]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        for name in self.parent_lookups:
+            # Объект загружается, только если сериализатор к нему обратится.
+            context[name] = SimpleLazyObject(
+                lambda name=name: self.get_parent(name)
+            )
+        return context
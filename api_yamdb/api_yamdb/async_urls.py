@@ -0,0 +1,12 @@
+"""
+Адреса ASGI приложения: чтение каталога обрабатывают асинхронные view
+(api.v1.async_views), остальные адреса совпадают с ROOT_URLCONF.
+"""
+from django.urls import include, path
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/v1/', include('api.v1.async_urls')),
+    *sync_urlpatterns,
+]
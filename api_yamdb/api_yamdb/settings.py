@@ -25,6 +25,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.PrometheusMetricsMiddleware',
+    'api.middleware.SlowQueryLogMiddleware',
+    'api.middleware.ReplicaRouterMiddleware',
+    'api.middleware.ResponseCacheMiddleware',
+    'api.middleware.AsyncReadMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -32,8 +37,34 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ProfilingMiddleware',
+    'api.middleware.ServerTimingMiddleware',
 ]
 
+SERVER_TIMING_ENABLED = False
+
+# Адреса ASGI приложения с асинхронным чтением каталога (api.v1.async_views),
+# например 'api_yamdb.async_urls'. None - ASGI приложение использует
+# ROOT_URLCONF. Выключено по умолчанию: в замерах benchmark_asgi на одном
+# CPU асинхронное чтение даёт 0.6-0.8 пропускной способности WSGI.
+ASYNC_READ_URLCONF = None
+
+METRICS_ENABLED = False
+
+METRICS_DIR = BASE_DIR / 'metrics'
+
+SLOW_QUERY_LOG_ENABLED = False
+
+SLOW_QUERY_THRESHOLD_MS = 500
+
+SLOW_QUERY_EXPLAIN_LIMIT = 5
+
+PROFILING_ENABLED = True
+
+PROFILING_PARAM = 'profile'
+
+PROFILING_TOP_N = 30
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
@@ -60,9 +91,71 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Подключение переиспользуется между запросами в течение 10 минут.
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# Алиасы баз из DATABASES, из которых читаются данные в HTTP запросах.
+DATABASE_REPLICAS = []
+
+# Алиасы баз из DATABASES, по которым отзывы и комментарии распределяются
+# по id произведения (см. reviews.sharding). Пустой список - все данные в
+# основной базе. После изменения списка выполните rebalance_shards.
+REVIEW_SHARDS = []
+
+DATABASE_ROUTERS = [
+    'reviews.sharding.ShardRouter',
+    'api.db_router.ReplicaRouter',
+]
+
+# Время после записи, в течение которого клиент читает из основной базы.
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_CACHE_ALIAS = 'replica_pins'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Кэш ответов и версий таблиц (см. api.response_cache). Память процесса
+    # подходит для одного процесса; несколько воркеров должны использовать
+    # общий кэш, например
+    # 'django.core.cache.backends.filebased.FileBasedCache' с каталогом в
+    # LOCATION или 'django.core.cache.backends.db.DatabaseCache' с таблицей
+    # в LOCATION (создаётся командой createcachetable).
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+    },
+    # Метки клиентов, которые читают из основной базы после записи (см.
+    # api.db_router). Как и кэш ответов, при нескольких воркерах должен быть
+    # общим, иначе запрос, попавший в другой воркер, прочитает реплику.
+    'replica_pins': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'replica_pins',
+    },
+}
+
+# Кэш ответов на анонимные GET-запросы к каталогу. Выключен по умолчанию:
+# кэш 'responses' в памяти процесса годится только для одного процесса, и
+# при нескольких воркерах они отдавали бы устаревшие ответы. Включайте
+# вместе с общим кэшем (см. CACHES выше).
+RESPONSE_CACHE_ENABLED = False
+RESPONSE_CACHE_ALIAS = 'responses'
+# Время жизни ответа в кэше, секунд. Изменения данных сбрасывают кэш сразу.
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Выполняются при каждом новом подключении к SQLite (см. api.sqlite).
+# Пустой словарь оставляет настройки SQLite по умолчанию.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение - размер кэша страниц в КиБ.
+    'cache_size': -64 * 1024,
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -101,13 +194,41 @@ EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 DEFAULT_FROM_EMAIL = 'admin@yamdb.com'
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'slow_queries.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'api.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+        },
+    },
+}
+
 
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.v1.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
@@ -118,6 +239,14 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Время, на которое версия токенов пользователя кэшируется в процессе. Если
+# кэш не общий для всех процессов, смена роли вступает в силу в остальных
+# процессах не позже чем через это время.
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+
+# Количество проверенных токенов в LRU кэше процесса; 0 - кэш выключен.
+TOKEN_CACHE_SIZE = 10000
+
 AUTH_USER_MODEL = 'reviews.User'
 
 USER = 'user'
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Comment, Review, Title, Genre, Category, User
+from .models import (Comment, Review, Title, Genre, Category,
+                     OutgoingEmail, User)
 
 
 admin.site.register(User)
@@ -9,3 +10,17 @@ admin.site.register(Category)
 admin.site.register(Title)
 admin.site.register(Comment)
 admin.site.register(Review)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipient', 'send_after', 'attempts',
+                    'sent_at')
+    # Текст не показывается: письма, поставленные в очередь до появления
+    # поля user, содержат код подтверждения.
+    exclude = ('body',)
+    readonly_fields = ('subject', 'from_email', 'recipient', 'user',
+                       'created', 'attempts', 'sent_at', 'last_error')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,119 @@
+"""
+Разбор строк csv файлов для команды load_csv.
+
+Модуль не обращается к ORM, чтобы его функции могли выполняться в
+отдельных процессах. Связи проверяются по множествам id из ID_SETS.
+
+Отзывы и комментарии разбираются в кортежи значений колонок REVIEW_COLUMNS
+и COMMENT_COLUMNS, готовые для вставки в таблицу без подготовки полей ORM.
+"""
+from datetime import timezone
+
+from django.utils.dateparse import parse_datetime
+
+from api_yamdb.settings import MAX_MARK, MIN_MARK
+
+ID_SETS = {}
+REVIEW_COLUMNS = ('id', 'title_id', 'text', 'author_id', 'score', 'pub_date')
+COMMENT_COLUMNS = ('id', 'review_id', 'text', 'author_id', 'pub_date')
+
+
+def init_worker(id_sets):
+    """Передаёт процессу-обработчику множества id существующих записей."""
+    ID_SETS.clear()
+    ID_SETS.update(id_sets)
+
+
+def parse_chunk(parser, header, rows):
+    """
+    Разбирает часть строк csv с заголовком header; некорректные строки
+    отбрасываются.
+    """
+    parsed = []
+    for values in rows:
+        try:
+            fields = parser(dict(zip(header, values)))
+        except (TypeError, ValueError):
+            continue
+        if fields is not None:
+            parsed.append(fields)
+    return parsed
+
+
+def parse_date(value):
+    """
+    Дата в том виде, в котором её хранит DateTimeField при USE_TZ: время
+    UTC без смещения. Дата без смещения считается датой в UTC (TIME_ZONE).
+    """
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'Некорректная дата: {value}')
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return str(date)
+
+
+def parse_user(row):
+    return {
+        'id': int(row['id']),
+        'username': row['username'],
+        'email': row['email'],
+        'role': row['role'],
+        'bio': row['bio'],
+        'first_name': row['first_name'],
+        'last_name': row['last_name'],
+    }
+
+
+def parse_genre(row):
+    return {'id': int(row['id']), 'name': row['name'], 'slug': row['slug']}
+
+
+parse_category = parse_genre
+
+
+def parse_title(row):
+    category_id = int(row['category'])
+    return {
+        'id': int(row['id']),
+        'name': row['name'],
+        'year': int(row['year']),
+        'category_id': (
+            category_id if category_id in ID_SETS['categories'] else None
+        ),
+    }
+
+
+def parse_genre_title(row):
+    title_id, genre_id = int(row['title_id']), int(row['genre_id'])
+    if title_id not in ID_SETS['titles'] or genre_id not in ID_SETS['genres']:
+        return None
+    return {'id': int(row['id']), 'title_id': title_id, 'genre_id': genre_id}
+
+
+def parse_review(row):
+    title_id, author_id = int(row['title_id']), int(row['author'])
+    score = int(row['score'])
+    if (
+        title_id not in ID_SETS['titles']
+        or author_id not in ID_SETS['users']
+        or not MIN_MARK <= score <= MAX_MARK
+    ):
+        return None
+    return (
+        int(row['id']), title_id, row['text'], author_id, score,
+        parse_date(row['pub_date']),
+    )
+
+
+def parse_comment(row):
+    review_id, author_id = int(row['review_id']), int(row['author'])
+    if (
+        review_id not in ID_SETS['reviews']
+        or author_id not in ID_SETS['users']
+    ):
+        return None
+    return (
+        int(row['id']), review_id, row['text'], author_id,
+        parse_date(row['pub_date']),
+    )
@@ -0,0 +1,263 @@
+import csv
+import random
+import time
+from datetime import timedelta
+from itertools import islice
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api_yamdb.settings import ADMIN, MAX_MARK, MIN_MARK, MODERATOR, USER
+from reviews.models import (Category, Comment, Genre, Review,
+                            Title, User, TitleGenre)
+from reviews.signals import bulk_changed
+from reviews.utils import keep_loaded_dates
+
+CHUNK_SIZE = 5000
+# Модель, имя csv файла и соответствие колонок csv полям модели в том виде,
+# в котором их читает команда load_csv.
+TABLES = (
+    (User, 'users.csv', {
+        'id': 'id', 'username': 'username', 'email': 'email', 'role': 'role',
+        'bio': 'bio', 'first_name': 'first_name', 'last_name': 'last_name',
+    }),
+    (Category, 'category.csv', {'id': 'id', 'name': 'name', 'slug': 'slug'}),
+    (Genre, 'genre.csv', {'id': 'id', 'name': 'name', 'slug': 'slug'}),
+    (Title, 'titles.csv', {
+        'id': 'id', 'name': 'name', 'year': 'year', 'category': 'category_id',
+    }),
+    (TitleGenre, 'genre_title.csv', {
+        'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id',
+    }),
+    (Review, 'review.csv', {
+        'id': 'id', 'title_id': 'title_id', 'text': 'text',
+        'author': 'author_id', 'score': 'score', 'pub_date': 'pub_date',
+    }),
+    (Comment, 'comments.csv', {
+        'id': 'id', 'review_id': 'review_id', 'text': 'text',
+        'author': 'author_id', 'pub_date': 'pub_date',
+    }),
+)
+
+
+def zipf_weights(size, skew):
+    return [1 / rank ** skew for rank in range(1, size + 1)]
+
+
+def zipf_counts(total, size, skew, cap, randomizer):
+    """
+    Распределяет total элементов по size группам по закону Ципфа: немногие
+    группы получают большую часть элементов. Дробные доли округляются
+    случайно, чтобы сохранить общее количество; размер группы ограничен cap.
+    """
+    if not size:
+        return []
+    weights = zipf_weights(size, skew)
+    scale = total / sum(weights)
+    counts = [
+        min(cap, int(weight * scale + randomizer.random()))
+        for weight in weights
+    ]
+    randomizer.shuffle(counts)
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерация большого набора данных для нагрузочного тестирования '
+        'в базу данных или в csv файлы для команды load_csv'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument(
+            '--reviews',
+            type=int,
+            default=100000,
+            help='Примерное общее количество отзывов.',
+        )
+        parser.add_argument(
+            '--comments',
+            type=int,
+            default=100000,
+            help='Примерное общее количество комментариев.',
+        )
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=0.8,
+            help='Показатель степенного распределения отзывов по '
+                 'произведениям и комментариев по отзывам.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            '--output-dir',
+            type=Path,
+            help='Записать csv файлы в каталог вместо базы данных.',
+        )
+
+    def generate_users(self):
+        roles = (USER,) * 18 + (MODERATOR, ADMIN)
+        for user_id in range(1, self.options['users'] + 1):
+            yield {
+                'id': user_id,
+                'username': f'user{user_id}',
+                'email': f'user{user_id}@yamdb.fake',
+                'role': self.random.choice(roles),
+                'bio': '',
+                'first_name': '',
+                'last_name': '',
+            }
+
+    def generate_categories(self):
+        for category_id in range(1, self.options['categories'] + 1):
+            yield {
+                'id': category_id,
+                'name': f'Категория {category_id}',
+                'slug': f'category-{category_id}',
+            }
+
+    def generate_genres(self):
+        for genre_id in range(1, self.options['genres'] + 1):
+            yield {
+                'id': genre_id,
+                'name': f'Жанр {genre_id}',
+                'slug': f'genre-{genre_id}',
+            }
+
+    def generate_titles(self):
+        category_ids = range(1, self.options['categories'] + 1)
+        weights = zipf_weights(len(category_ids), self.options['skew'])
+        current_year = timezone.now().year
+        for title_id in range(1, self.options['titles'] + 1):
+            yield {
+                'id': title_id,
+                'name': f'Произведение {title_id}',
+                'year': self.random.randint(1900, current_year),
+                'category_id': self.random.choices(category_ids, weights)[0],
+            }
+
+    def generate_title_genres(self):
+        genre_ids = range(1, self.options['genres'] + 1)
+        link_id = 0
+        for title_id in range(1, self.options['titles'] + 1):
+            count = min(len(genre_ids), self.random.choice((1, 1, 2, 2, 3)))
+            for genre_id in self.random.sample(genre_ids, count):
+                link_id += 1
+                yield {
+                    'id': link_id, 'title_id': title_id, 'genre_id': genre_id,
+                }
+
+    def generate_reviews(self):
+        """
+        Отзывы распределяются по произведениям степенным законом. Авторы
+        отзывов на одно произведение не повторяются.
+        """
+        user_ids = range(1, self.options['users'] + 1)
+        counts = zipf_counts(
+            self.options['reviews'], self.options['titles'],
+            self.options['skew'], len(user_ids), self.random,
+        )
+        review_id = 0
+        for title_id, count in enumerate(counts, 1):
+            for author_id in self.random.sample(user_ids, count):
+                review_id += 1
+                yield {
+                    'id': review_id,
+                    'title_id': title_id,
+                    'text': f'Отзыв {review_id}',
+                    'author_id': author_id,
+                    'score': self.random.randint(MIN_MARK, MAX_MARK),
+                    'pub_date': self.pub_date(),
+                }
+        self.review_count = review_id
+
+    def generate_comments(self):
+        counts = zipf_counts(
+            self.options['comments'], self.review_count,
+            self.options['skew'], self.options['comments'], self.random,
+        )
+        comment_id = 0
+        for review_id, count in enumerate(counts, 1):
+            for _ in range(count):
+                comment_id += 1
+                yield {
+                    'id': comment_id,
+                    'review_id': review_id,
+                    'text': f'Комментарий {comment_id}',
+                    'author_id': self.random.randint(
+                        1, self.options['users']
+                    ),
+                    'pub_date': self.pub_date(),
+                }
+
+    def pub_date(self):
+        return (
+            self.now - timedelta(seconds=self.random.randint(0, 10 ** 8))
+        ).isoformat()
+
+    def write_csv(self, filename, columns, rows):
+        path = self.options['output_dir'] / filename
+        with open(path, 'w', encoding='utf8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            count = 0
+            for fields in rows:
+                writer.writerow(fields[name] for name in columns.values())
+                count += 1
+        return count
+
+    def write_db(self, model, rows):
+        count = 0
+        while True:
+            chunk = [
+                model(**fields)
+                for fields in islice(rows, self.options['chunk_size'])
+            ]
+            if not chunk:
+                bulk_changed.send(sender=model)
+                return count
+            with transaction.atomic():
+                with keep_loaded_dates(model):
+                    model.objects.bulk_create(chunk)
+            count += len(chunk)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.random = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.review_count = 0
+        output_dir = options['output_dir']
+        if output_dir is not None:
+            output_dir = options['output_dir'] = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+        elif any(model.objects.exists() for model, _, _ in TABLES):
+            raise CommandError(
+                'База данных не пуста. Укажите --output-dir, чтобы записать '
+                'данные в csv файлы.'
+            )
+        generators = (
+            self.generate_users, self.generate_categories,
+            self.generate_genres, self.generate_titles,
+            self.generate_title_genres, self.generate_reviews,
+            self.generate_comments,
+        )
+        for (model, filename, columns), generate in zip(TABLES, generators):
+            start = time.perf_counter()
+            if output_dir is None:
+                count = self.write_db(model, generate())
+            else:
+                count = self.write_csv(filename, columns, generate())
+            print(
+                f'Сгенерировано {count} записей {model.__name__} за '
+                f'{time.perf_counter() - start:.2f} с.'
+            )
+        if output_dir is None:
+            call_command('recalculate_ratings')
@@ -1,149 +1,366 @@
 import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
 
+from reviews import csv_parsers
 from reviews.models import (Category, Comment, Genre, Review,
                             Title, User, TitleGenre)
+from reviews.signals import bulk_changed
+
+DATA_DIR = settings.BASE_DIR / 'static/data'
+CHECKPOINT_PATH = settings.BASE_DIR / 'load_csv_checkpoint.json'
+CHUNK_SIZE = 5000
+DELETE_BATCH_SIZE = 500
+# Справочники при синхронизации сопоставляются по slug, остальные - по id.
+UPSERT_KEYS = {Genre: 'slug', Category: 'slug'}
+# Модели, строки которых разбираются в кортежи значений этих колонок и
+# вставляются в таблицу без bulk_create.
+ROW_COLUMNS = {
+    Review: csv_parsers.REVIEW_COLUMNS,
+    Comment: csv_parsers.COMMENT_COLUMNS,
+}
+
+
+def load_ids(model):
+    """Загружает множество существующих id модели для проверки связей."""
+    return set(model.objects.values_list('id', flat=True))
+
+
+def insert_rows(model, columns, rows, ignore_conflicts=False):
+    """
+    Вставляет кортежи значений колонок в таблицу модели одним executemany:
+    значения уже подготовлены при разборе, поэтому подготовка каждого поля
+    в bulk_create не нужна.
+    """
+    connection = connections[model.objects.db]
+    quote_name = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in columns]
+    sql = '{} {} ({}) VALUES ({}) {}'.format(
+        connection.ops.insert_statement(ignore_conflicts=ignore_conflicts),
+        quote_name(model._meta.db_table),
+        ', '.join(quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+        connection.ops.ignore_conflicts_suffix_sql(
+            ignore_conflicts=ignore_conflicts
+        ),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def iter_chunks(rows, chunk_size):
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
 
 
 class Command(BaseCommand):
     help = 'Загрузка csv файлов в базу данных'
 
-    def ImportUser(self):
-        if User.objects.exists():
-            print('Данные для User уже загружены.')
-        else:
-            with open(
-                settings.BASE_DIR / 'static/data/users.csv',
-                'r',
-                encoding='utf8'
-            ) as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    User.objects.create(
-                        id=row['id'],
-                        username=row['username'],
-                        email=row['email'],
-                        role=row['role'],
-                        bio=row['bio'],
-                        first_name=row['first_name'],
-                        last_name=row['last_name'],)
-                print('Данные для User успешно загружены!')
-
-    def ImportGenre(self):
-        if Genre.objects.exists():
-            print('Данные для Genre уже загружены.')
-        else:
-            with open(
-                settings.BASE_DIR / 'static/data/genre.csv',
-                'r',
-                encoding='utf8'
-            ) as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    Genre.objects.create(
-                        id=row['id'],
-                        name=row['name'],
-                        slug=row['slug'],)
-                print('Данные для Genre успешно загружены!')
-
-    def ImportCategory(self):
-        if Category.objects.exists():
-            print('Данные для Category уже загружены.')
-        else:
-            with open(
-                settings.BASE_DIR / 'static/data/category.csv',
-                'r',
-                encoding='utf8'
-            ) as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    Category.objects.create(
-                        id=row['id'],
-                        name=row['name'],
-                        slug=row['slug'],)
-                print('Данные для Category успешно загружены!')
-
-    def ImportTitle(self):
-        if Title.objects.exists():
-            print('Данные для Title уже загружены.')
-        else:
-            with open(
-                settings.BASE_DIR / 'static/data/titles.csv',
-                'r',
-                encoding='utf8'
-            ) as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    Title.objects.create(
-                        id=row['id'],
-                        name=row['name'],
-                        year=row['year'],
-                        category=Category.objects.get(id=row['category']),)
-                print('Данные для Title успешно загружены!')
-
-    def ImportGenreTitle(self):
-        if TitleGenre.objects.exists():
-            print('Данные для TitleGenre уже загружены.')
-        else:
-            with open(
-                settings.BASE_DIR / 'static/data/genre_title.csv',
-                'r',
-                encoding='utf8'
-            ) as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    TitleGenre.objects.create(
-                        id=row['id'],
-                        title_id=row['title_id'],
-                        genre_id=row['genre_id'],)
-                print('Данные для TitleGenre успешно загружены!')
-
-    def ImportReview(self):
-        if Review.objects.exists():
-            print('Данные для Review уже загружены.')
-        else:
-            with open(
-                settings.BASE_DIR / 'static/data/review.csv',
-                'r',
-                encoding='utf8'
-            ) as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    Review.objects.create(
-                        id=row['id'],
-                        title_id=row['title_id'],
-                        text=row['text'],
-                        author=User.objects.get(id=row['author']),
-                        score=row['score'],
-                        pub_date=row['pub_date'],)
-                print('Данные для Review успешно загружены!')
-
-    def ImportComments(self):
-        if Comment.objects.exists():
-            print('Данные для Comment уже загружены.')
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество процессов для разбора и проверки строк csv.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Количество строк, сохраняемых одной транзакцией.',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить прерванную загрузку с последней сохранённой '
+                 'части вместо пропуска заполненных таблиц.',
+        )
+        parser.add_argument(
+            '--data-dir',
+            type=Path,
+            default=DATA_DIR,
+            help='Каталог с csv файлами.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=Path,
+            default=CHECKPOINT_PATH,
+            help='Файл, в котором сохраняется прогресс загрузки.',
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Синхронизировать заполненные таблицы с csv: добавить новые '
+                 'строки и обновить изменившиеся, не трогая остальные.',
+        )
+        parser.add_argument(
+            '--delete-missing',
+            action='store_true',
+            help='При --upsert удалить записи, которых нет в csv.',
+        )
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def save_checkpoint(self):
+        """Атомарно перезаписывает файл с прогрессом загрузки."""
+        temp_path = self.checkpoint_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf8') as file:
+            json.dump(self.checkpoint, file)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def parse(self, parser, header, chunks):
+        """
+        Разбирает части csv по порядку. Строки читаются списками значений, а
+        словари по заголовку header составляются при разборе. При нескольких
+        обработчиках части разбираются параллельно, но возвращаются в
+        исходном порядке, а число одновременно обрабатываемых частей
+        ограничено.
+        """
+        if self.workers <= 1:
+            for rows in chunks:
+                yield len(rows), csv_parsers.parse_chunk(parser, header, rows)
+            return
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=csv_parsers.init_worker,
+            initargs=(dict(csv_parsers.ID_SETS),),
+        ) as executor:
+            pending = deque()
+            for rows in chunks:
+                pending.append((
+                    len(rows),
+                    executor.submit(
+                        csv_parsers.parse_chunk, parser, header, rows
+                    ),
+                ))
+                if len(pending) >= self.workers * 2:
+                    count, future = pending.popleft()
+                    yield count, future.result()
+            while pending:
+                count, future = pending.popleft()
+                yield count, future.result()
+
+    def remap_ids(self, fields):
+        """Заменяет id справочников из csv на id совпавших по slug записей."""
+        for attname, id_map in self.id_maps.items():
+            if fields.get(attname) in id_map:
+                fields[attname] = id_map[fields[attname]]
+        return fields
+
+    def get_update_fields(self, model, key, fields):
+        return [
+            name for name in fields
+            if name not in ('id', key)
+            and not getattr(model._meta.get_field(name), 'auto_now_add', False)
+        ]
+
+    def insert(self, model, parsed, ignore_conflicts=False):
+        """Сохраняет разобранные строки части."""
+        columns = ROW_COLUMNS.get(model)
+        if columns is not None:
+            insert_rows(model, columns, parsed, ignore_conflicts)
+            return
+        model.objects.bulk_create(
+            [model(**fields) for fields in parsed],
+            ignore_conflicts=ignore_conflicts,
+        )
+
+    def upsert_chunk(self, model, key, parsed):
+        """
+        Сохраняет новые строки части и обновляет только те существующие,
+        у которых изменились значения. Возвращает количество добавленных и
+        обновлённых строк.
+        """
+        by_key = {fields[key]: fields for fields in parsed}
+        existing = model.objects.in_bulk(by_key, field_name=key)
+        id_map = self.id_maps.get(f'{model._meta.model_name}_id')
+        new, changed, changed_fields = [], [], set()
+        for value, fields in by_key.items():
+            instance = existing.get(value)
+            if id_map is not None:
+                id_map[fields['id']] = (
+                    instance.id if instance is not None else fields['id']
+                )
+            if instance is None:
+                new.append(fields)
+                continue
+            diff = []
+            for name in self.get_update_fields(model, key, fields):
+                new_value = model._meta.get_field(name).to_python(fields[name])
+                if getattr(instance, name) != new_value:
+                    setattr(instance, name, new_value)
+                    diff.append(name)
+            if diff:
+                changed.append(instance)
+                changed_fields.update(diff)
+        columns = ROW_COLUMNS.get(model)
+        if columns is not None:
+            new = [tuple(fields[name] for name in columns) for fields in new]
+        with transaction.atomic():
+            self.insert(model, new)
+            if changed:
+                model.objects.bulk_update(changed, changed_fields)
+        return len(new), len(changed)
+
+    def delete_missing(self, model, key, seen):
+        missing = [
+            value
+            for value in model.objects.values_list(key, flat=True).iterator()
+            if value not in seen
+        ]
+        for start in range(0, len(missing), DELETE_BATCH_SIZE):
+            model.objects.filter(
+                **{f'{key}__in': missing[start:start + DELETE_BATCH_SIZE]}
+            ).delete()
+        return len(missing)
+
+    def upsert(self, model, filename, parser):
+        """
+        Синхронизирует таблицу с csv файлом. Возвращает количество
+        добавленных, обновлённых и удалённых строк.
+        """
+        name = model.__name__
+        key = UPSERT_KEYS.get(model, 'id')
+        inserted = updated = unchanged = deleted = skipped = 0
+        seen = set()
+        with open(self.data_dir / filename, 'r', encoding='utf8') as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            chunks = iter_chunks(reader, self.chunk_size)
+            columns = ROW_COLUMNS.get(model)
+            for count, parsed in self.parse(parser, header, chunks):
+                parsed = [
+                    self.remap_ids(
+                        dict(zip(columns, fields)) if columns else fields
+                    )
+                    for fields in parsed
+                ]
+                chunk_inserted, chunk_updated = self.upsert_chunk(
+                    model, key, parsed
+                )
+                seen.update(fields[key] for fields in parsed)
+                inserted += chunk_inserted
+                updated += chunk_updated
+                unchanged += len(parsed) - chunk_inserted - chunk_updated
+                skipped += count - len(parsed)
+        if self.delete_mode:
+            deleted = self.delete_missing(model, key, seen)
+        print(
+            f'Данные для {name} синхронизированы: добавлено {inserted}, '
+            f'обновлено {updated}, без изменений {unchanged}, '
+            f'удалено {deleted}.'
+        )
+        if skipped:
+            print(f'Пропущено некорректных строк {name}: {skipped}.')
+        return inserted + updated + deleted
+
+    def load(self, model, filename, parser):
+        """
+        Потоково читает csv файл и сохраняет его частями, каждую часть - в
+        своей транзакции. После каждой части в файл прогресса записывается
+        количество обработанных строк. Возвращает количество
+        загруженных строк или None, если таблица уже загружена.
+        """
+        if self.upsert_mode:
+            return self.upsert(model, filename, parser)
+        name = model.__name__
+        progress = self.checkpoint.get(name)
+        if progress is None:
+            if model.objects.exists():
+                print(f'Данные для {name} уже загружены.')
+                return None
+            progress = self.checkpoint[name] = {'rows': 0, 'done': False}
+        elif progress['done']:
+            print(f'Данные для {name} уже загружены.')
+            return None
         else:
-            with open(
-                settings.BASE_DIR / 'static/data/comments.csv',
-                'r',
-                encoding='utf8'
-            ) as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    Comment.objects.create(
-                        id=row['id'],
-                        review_id=row['review_id'],
-                        text=row['text'],
-                        author=User.objects.get(id=row['author']),
-                        pub_date=row['pub_date'],)
-                print('Данные для Comment успешно загружены!')
-
-    def handle(self, *args, **kwargs):
-        self.ImportUser()
-        self.ImportGenre()
-        self.ImportCategory()
-        self.ImportTitle()
-        self.ImportGenreTitle()
-        self.ImportReview()
-        self.ImportComments()
+            print(f'Продолжение загрузки {name} со строки {progress["rows"]}.')
+        # Часть, сохранённая перед прерыванием, могла не попасть в файл
+        # прогресса, поэтому при продолжении повторы первой части пропускаются.
+        resumed = progress['rows'] > 0
+        start = time.perf_counter()
+        loaded = skipped = 0
+        with open(self.data_dir / filename, 'r', encoding='utf8') as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            rows = islice(reader, progress['rows'], None)
+            chunks = iter_chunks(rows, self.chunk_size)
+            for count, parsed in self.parse(parser, header, chunks):
+                with transaction.atomic(using=model.objects.db):
+                    self.insert(model, parsed, ignore_conflicts=resumed)
+                resumed = False
+                progress['rows'] += count
+                self.save_checkpoint()
+                loaded += len(parsed)
+                skipped += count - len(parsed)
+        progress['done'] = True
+        self.save_checkpoint()
+        elapsed = time.perf_counter() - start
+        print(
+            f'Данные для {name} успешно загружены! {loaded} строк за '
+            f'{elapsed:.2f} с ({loaded / max(elapsed, 1e-6):.0f} строк/с).'
+        )
+        if skipped:
+            print(f'Пропущено некорректных строк {name}: {skipped}.')
+        return loaded
+
+    def handle(self, *args, **options):
+        self.workers = options['workers']
+        self.chunk_size = options['chunk_size']
+        self.data_dir = Path(options['data_dir'])
+        self.checkpoint_path = Path(options['checkpoint'])
+        self.checkpoint = self.read_checkpoint() if options['resume'] else {}
+        self.upsert_mode = options['upsert']
+        self.delete_mode = options['delete_missing']
+        if self.upsert_mode and options['resume']:
+            raise CommandError('Опции --upsert и --resume несовместимы.')
+        if self.delete_mode and not self.upsert_mode:
+            raise CommandError('Опция --delete-missing требует --upsert.')
+        self.id_maps = (
+            {'genre_id': {}, 'category_id': {}} if self.upsert_mode else {}
+        )
+        ids = csv_parsers.ID_SETS
+
+        self.load(User, 'users.csv', csv_parsers.parse_user)
+        self.load(Genre, 'genre.csv', csv_parsers.parse_genre)
+        self.load(Category, 'category.csv', csv_parsers.parse_category)
+        ids['users'] = load_ids(User)
+        ids['genres'] = (
+            load_ids(Genre) | self.id_maps.get('genre_id', {}).keys()
+        )
+        ids['categories'] = (
+            load_ids(Category) | self.id_maps.get('category_id', {}).keys()
+        )
+        self.load(Title, 'titles.csv', csv_parsers.parse_title)
+        ids['titles'] = load_ids(Title)
+        self.load(
+            TitleGenre, 'genre_title.csv', csv_parsers.parse_genre_title
+        )
+        if self.load(
+            Review, 'review.csv', csv_parsers.parse_review
+        ) is not None:
+            call_command('recalculate_ratings')
+        ids['reviews'] = load_ids(Review)
+        self.load(Comment, 'comments.csv', csv_parsers.parse_comment)
+        ids.clear()
+        for model in (User, Genre, Category, Title, TitleGenre, Review,
+                      Comment):
+            bulk_changed.send(sender=model)
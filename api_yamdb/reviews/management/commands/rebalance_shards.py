@@ -0,0 +1,88 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Mod
+
+from reviews.models import Comment, Review
+from reviews.sharding import (get_databases, get_shards, get_title_shard,
+                              sync_id_sequence)
+from reviews.signals import suspend_rating_updates
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Перенос отзывов и комментариев в шарды их произведений после '
+        'изменения REVIEW_SHARDS или загрузки данных в основную базу'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество отзывов, переносимых за одну транзакцию.',
+        )
+
+    def get_misplaced(self, alias):
+        """Отзывы базы alias, которые должны лежать в другом шарде."""
+        shards = get_shards()
+        reviews = Review.objects.using(alias).order_by('id')
+        if alias not in shards:
+            return reviews
+        return reviews.annotate(
+            shard=Mod('title_id', len(shards))
+        ).exclude(shard=shards.index(alias))
+
+    def move(self, source, reviews):
+        """
+        Копирует отзывы с комментариями в их шарды, затем удаляет из
+        исходной базы. Записи переносятся с прежними id, поэтому повторный
+        запуск после сбоя пропускает уже скопированные строки.
+        """
+        ids = [review.id for review in reviews]
+        comments = list(
+            Comment.objects.using(source).filter(review_id__in=ids)
+        )
+        targets = defaultdict(lambda: ([], []))
+        for review in reviews:
+            targets[get_title_shard(review.title_id)][0].append(review)
+        shard_of_review = {
+            review.id: get_title_shard(review.title_id) for review in reviews
+        }
+        for comment in comments:
+            targets[shard_of_review[comment.review_id]][1].append(comment)
+        for target, (target_reviews, target_comments) in targets.items():
+            with transaction.atomic(using=target):
+                Review.objects.using(target).bulk_create(
+                    target_reviews, ignore_conflicts=True
+                )
+                Comment.objects.using(target).bulk_create(
+                    target_comments, ignore_conflicts=True
+                )
+        # Перенесённые отзывы остаются в рейтинге произведения.
+        with transaction.atomic(using=source), suspend_rating_updates():
+            Comment.objects.using(source).filter(review_id__in=ids).delete()
+            Review.objects.using(source).filter(id__in=ids).delete()
+        return len(comments)
+
+    def handle(self, *args, **options):
+        if not get_shards():
+            raise CommandError('Шарды не заданы: REVIEW_SHARDS пуст.')
+        batch_size = options['batch_size']
+        moved_reviews = moved_comments = 0
+        for alias in get_databases():
+            while True:
+                reviews = list(self.get_misplaced(alias)[:batch_size])
+                if not reviews:
+                    break
+                moved_comments += self.move(alias, reviews)
+                moved_reviews += len(reviews)
+        for model in (Review, Comment):
+            sync_id_sequence(model)
+        print(
+            f'Перенесено {moved_reviews} отзывов и {moved_comments} '
+            'комментариев.'
+        )
@@ -0,0 +1,102 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import (Count, F, FloatField, IntegerField, OuterRef,
+                              Subquery, Sum)
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from reviews.models import Review, Title
+from reviews.sharding import get_databases, get_shards
+from reviews.signals import bulk_changed
+
+BATCH_SIZE = 1000
+
+
+def get_review_total(aggregate):
+    """Подзапрос с итогом aggregate по отзывам каждого произведения."""
+    reviews = Review.objects.filter(title_id=OuterRef('pk')).order_by()
+    return Coalesce(
+        Subquery(
+            reviews.values('title_id').annotate(
+                total=aggregate
+            ).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт сохранённых рейтингов произведений по отзывам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество произведений, обновляемых одним запросом, '
+                 'когда отзывы распределены по шардам.',
+        )
+
+    def handle(self, *args, **options):
+        if get_shards():
+            updated = self.update_from_shards(options['batch_size'])
+        else:
+            with transaction.atomic():
+                updated = self.update_in_database()
+        bulk_changed.send(sender=Title)
+        print(f'Рейтинги пересчитаны для {updated} произведений.')
+
+    def update_in_database(self):
+        """
+        Пересчитывает рейтинги двумя запросами UPDATE: отзывы лежат в той же
+        базе, что и произведения, и итоги считаются подзапросами.
+        """
+        updated = Title.objects.update(
+            score_sum=get_review_total(Sum('score')),
+            score_count=get_review_total(Count('id')),
+        )
+        Title.objects.update(
+            rating=Cast(F('score_sum'), FloatField()) / NullIf(
+                F('score_count'), 0
+            )
+        )
+        return updated
+
+    def update_from_shards(self, batch_size):
+        """
+        Складывает итоги отзывов из основной базы и шардов
+        (reviews.sharding) и сохраняет их пачками.
+        """
+        totals = {}
+        for alias in get_databases():
+            for row in Review.objects.using(alias).order_by().values(
+                'title_id'
+            ).annotate(score_sum=Sum('score'), score_count=Count('id')):
+                score_sum, score_count = totals.get(row['title_id'], (0, 0))
+                totals[row['title_id']] = (
+                    score_sum + row['score_sum'],
+                    score_count + row['score_count'],
+                )
+        batch = []
+        updated = 0
+        with transaction.atomic():
+            for title in Title.objects.only(
+                'id', 'score_sum', 'score_count', 'rating'
+            ).iterator(chunk_size=batch_size):
+                score_sum, score_count = totals.get(title.id, (0, 0))
+                title.score_sum = score_sum
+                title.score_count = score_count
+                title.rating = score_sum / score_count if score_count else None
+                batch.append(title)
+                if len(batch) >= batch_size:
+                    updated += self.flush(batch)
+            updated += self.flush(batch)
+        return updated
+
+    def flush(self, batch):
+        Title.objects.bulk_update(
+            batch, ('score_sum', 'score_count', 'rating')
+        )
+        count = len(batch)
+        batch.clear()
+        return count
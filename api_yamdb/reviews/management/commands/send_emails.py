@@ -0,0 +1,141 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+# Задержка перед повторной отправкой удваивается после каждой неудачи.
+BACKOFF_SECONDS = 30
+# Время, на которое письма пачки закрепляются за обработчиком: другие
+# обработчики не возьмут их, пока отправка не завершится или не истечёт срок.
+LEASE = timedelta(minutes=5)
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправка писем из очереди OutgoingEmail пачками через одно '
+        'подключение к почтовому серверу с повтором при ошибках'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=MAX_ATTEMPTS,
+            help='Количество попыток, после которого письмо не отправляется.',
+        )
+        parser.add_argument(
+            '--backoff',
+            type=float,
+            default=BACKOFF_SECONDS,
+            help='Задержка перед первой повторной попыткой в секундах.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Пауза между проверками пустой очереди в секундах.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить письма, готовые к отправке, и завершить работу.',
+        )
+
+    def find_ready(self):
+        """Письма, готовые к отправке."""
+        return list(
+            OutgoingEmail.objects.select_related('user').filter(
+                sent_at__isnull=True,
+                send_after__lte=timezone.now(),
+                attempts__lt=self.options['max_attempts'],
+            )[:self.options['batch_size']]
+        )
+
+    def claim(self, emails):
+        """
+        Закрепляет письма за собой условным обновлением: письмо достаётся
+        обработчику, только если другой обработчик не изменил его send_after
+        после чтения. select_for_update не блокирует строки в SQLite, поэтому
+        пачки разделяются только так.
+        """
+        lease = timezone.now() + LEASE
+        claimed = []
+        # Транзакция начинается с записи: SQLite ждёт блокировку по
+        # busy_timeout, а не завершается ошибкой из-за устаревшего снимка.
+        with transaction.atomic():
+            for email in emails:
+                if OutgoingEmail.objects.filter(
+                    pk=email.pk, send_after=email.send_after
+                ).update(send_after=lease):
+                    email.send_after = lease
+                    claimed.append(email)
+        return claimed
+
+    def send_batch(self, connection, batch):
+        sent = failed = 0
+        for email in batch:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.render_body(),
+                from_email=email.from_email,
+                to=[email.recipient],
+                connection=connection,
+            )
+            try:
+                # Открытое подключение переиспользуется, закрытое после
+                # ошибки - открывается заново.
+                connection.open()
+                message.send()
+            except Exception as error:
+                connection.close()
+                email.attempts += 1
+                email.send_after = timezone.now() + timedelta(
+                    seconds=self.options['backoff'] * 2 ** (email.attempts - 1)
+                )
+                email.last_error = repr(error)
+                failed += 1
+            else:
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent += 1
+        OutgoingEmail.objects.bulk_update(
+            batch, ['attempts', 'send_after', 'sent_at', 'last_error']
+        )
+        return sent, failed
+
+    def handle(self, *args, **options):
+        self.options = options
+        total_sent = total_failed = 0
+        connection = get_connection(fail_silently=False)
+        try:
+            while True:
+                ready = self.find_ready()
+                if not ready:
+                    if options['once']:
+                        break
+                    # Подключение не держится открытым, пока очередь пуста.
+                    connection.close()
+                    time.sleep(options['interval'])
+                    continue
+                # Пачка пуста, если все письма закрепил другой обработчик.
+                batch = self.claim(ready)
+                sent, failed = self.send_batch(connection, batch)
+                total_sent += sent
+                total_failed += failed
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+        print(
+            f'Отправлено писем: {total_sent}, ошибок отправки: '
+            f'{total_failed}.'
+        )
@@ -0,0 +1,59 @@
+from django.db import migrations, models
+from django.db.models import Count, Min
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def delete_invalid_links(apps, schema_editor):
+    """
+    Удаляет связи без произведения или жанра и повторы одной пары
+    (остаётся связь с наименьшим id) частями по BATCH_SIZE.
+    """
+    alias = schema_editor.connection.alias
+    TitleGenre = apps.get_model('reviews', 'TitleGenre')
+    TitleGenre.objects.using(alias).filter(
+        models.Q(title__isnull=True) | models.Q(genre__isnull=True)
+    ).delete()
+    duplicates = (
+        TitleGenre.objects.using(alias).values('title', 'genre')
+        .annotate(first_id=Min('id'), links=Count('id'))
+        .filter(links__gt=1)
+        .values_list('title', 'genre', 'first_id')
+    )
+    extra_ids = []
+    for title_id, genre_id, first_id in duplicates.iterator():
+        extra_ids.extend(
+            TitleGenre.objects.using(alias)
+            .filter(title_id=title_id, genre_id=genre_id)
+            .exclude(id=first_id).values_list('id', flat=True)
+        )
+    for start in range(0, len(extra_ids), BATCH_SIZE):
+        TitleGenre.objects.using(alias).filter(
+            id__in=extra_ids[start:start + BATCH_SIZE]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_user_token_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_invalid_links, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='titlegenre',
+            name='genre',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reviews.genre', verbose_name='Жанр'),
+        ),
+        migrations.AlterField(
+            model_name='titlegenre',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reviews.title', verbose_name='Произведение'),
+        ),
+        migrations.AddConstraint(
+            model_name='titlegenre',
+            constraint=models.UniqueConstraint(fields=('title', 'genre'), name='reviews_titlegenre_unique_title_genre'),
+        ),
+    ]
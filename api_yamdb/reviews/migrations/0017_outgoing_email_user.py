@@ -0,0 +1,36 @@
+# Generated by Django 3.2 on 2026-10-18 04:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def clear_sent_bodies(apps, schema_editor):
+    """Удаляет из отправленных писем тексты с кодами подтверждения."""
+    OutgoingEmail = apps.get_model('reviews', 'OutgoingEmail')
+    OutgoingEmail.objects.using(schema_editor.connection.alias).filter(
+        sent_at__isnull=False
+    ).update(body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0016_sharding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_emails', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AlterField(
+            model_name='outgoingemail',
+            name='body',
+            field=models.TextField(help_text='{confirmation_code} заменяется кодом подтверждения пользователя при отправке.', verbose_name='Текст'),
+        ),
+        migrations.RunPython(
+            clear_sent_bodies, migrations.RunPython.noop
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import UserManager as DjangoUserManager
+from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
 
 from api_yamdb.settings import (
     ADMIN,
@@ -14,8 +17,35 @@ from api_yamdb.settings import (
     USER,
 )
 
+from .sharding import ShardedModel
 from .validators import validate_username, year_validator
 
+# Поля пользователя, которые передаются в токене. При их изменении выданные
+# ранее токены перестают действовать.
+TOKEN_CLAIM_FIELDS = ('role', 'is_staff', 'is_superuser', 'is_active')
+TOKEN_VERSION_CACHE_KEY = 'token_version:{}'
+# Заменяется в тексте письма кодом подтверждения пользователя при отправке.
+CONFIRMATION_CODE_PLACEHOLDER = '{confirmation_code}'
+# Поля рейтинга произведения, которые обновляют только сигналы отзывов.
+TITLE_RATING_FIELDS = ('score_sum', 'score_count', 'rating')
+
+
+class UserQuerySet(models.QuerySet):
+
+    def delete(self):
+        """
+        Удаляет пользователей вместе с отзывами; рейтинг каждого
+        произведения сдвигается одним запросом на все удалённые отзывы.
+        """
+        from .signals import group_rating_updates
+
+        with transaction.atomic(using=self.db), group_rating_updates():
+            return super().delete()
+
+
+class UserManager(DjangoUserManager.from_queryset(UserQuerySet)):
+    pass
+
 
 class User(AbstractUser):
     """Кастомная модель пользователя"""
@@ -48,12 +78,64 @@ class User(AbstractUser):
         default=USER,
         max_length=MAX_ROLE_LENGTH,
     )
+    token_version = models.PositiveIntegerField(
+        'Версия токенов', default=0, editable=False
+    )
+
+    objects = UserManager()
 
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ['username']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные роль и права для проверки их изменения."""
+        instance = super().from_db(db, field_names, values)
+        if all(field in instance.__dict__ for field in TOKEN_CLAIM_FIELDS):
+            instance._loaded_claims = instance.get_claims_state()
+        return instance
+
+    def get_claims_state(self):
+        return tuple(getattr(self, field) for field in TOKEN_CLAIM_FIELDS)
+
+    def save(self, *args, **kwargs):
+        """
+        Увеличивает версию токенов, если изменились роль или права
+        пользователя: токены с прежними claims отклоняются.
+        """
+        loaded_claims = getattr(self, '_loaded_claims', None)
+        if (
+            loaded_claims is not None
+            and loaded_claims != self.get_claims_state()
+        ):
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_claims = self.get_claims_state()
+
+    def revoke_tokens(self):
+        """Отзывает все выданные пользователю токены."""
+        self.token_version = models.F('token_version') + 1
+        self.save(update_fields=['token_version'])
+        self.refresh_from_db(fields=['token_version'])
+
+    def delete(self, *args, **kwargs):
+        """
+        Удаляет пользователя вместе с отзывами; рейтинг каждого
+        произведения сдвигается одним запросом на все удалённые отзывы.
+        """
+        from .signals import group_rating_updates
+
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using), group_rating_updates():
+            return super().delete(*args, **kwargs)
+
     @property
     def is_admin(self):
         """Проверяем является ли пользователь админом или суперюзером"""
@@ -102,6 +184,16 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def delete(self):
+        """Удаляет произведения без пересчёта рейтинга их отзывов."""
+        from .signals import suspend_rating_updates
+
+        with suspend_rating_updates():
+            return super().delete()
+
+
 class Title(models.Model):
     category = models.ForeignKey(
         Category,
@@ -125,11 +217,58 @@ class Title(models.Model):
     description = models.TextField(
         verbose_name='Описание', blank=True,
     )
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False
+    )
+    score_count = models.PositiveIntegerField(
+        'Количество оценок', default=0, editable=False
+    )
+    rating = models.FloatField(
+        'Рейтинг', null=True, blank=True, editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+            models.Index(
+                fields=['category', 'name'], name='title_category_name_idx'
+            ),
+            models.Index(fields=['year'], name='title_year_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Не перезаписывает поля рейтинга при изменении произведения: их
+        атомарно сдвигают сигналы отзывов, и значения в памяти могут быть
+        устаревшими.
+        """
+        if (
+            not self._state.adding
+            and not kwargs.get('force_insert')
+            and kwargs.get('update_fields') is None
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in TITLE_RATING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """
+        Удаляет произведение без пересчёта рейтинга: каскадное удаление
+        отзывов иначе сдвигало бы рейтинг удаляемой записи по запросу на
+        каждый отзыв.
+        """
+        from .signals import suspend_rating_updates
+
+        with suspend_rating_updates():
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -139,38 +278,43 @@ class TitleGenre(models.Model):
 
     title = models.ForeignKey(
         Title,
-        blank=True,
-        null=True,
         on_delete=models.CASCADE,
         verbose_name='Произведение'
     )
     genre = models.ForeignKey(
         Genre,
-        blank=True,
-        null=True,
-        on_delete=models.SET_NULL,
+        on_delete=models.CASCADE,
         verbose_name='Жанр',
     )
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='%(app_label)s_%(class)s_unique_title_genre',
+                fields=['title', 'genre'],
+            ),
+        ]
         ordering = ['title']
 
     def __str__(self):
         return f'{self.title} - {self.genre}'
 
 
-class Review(models.Model):
+class Review(ShardedModel):
+    # Отзыв может храниться в шарде без произведения и автора, поэтому в
+    # базах шардов ограничения внешних ключей удаляются миграцией
+    # (DropShardConstraints в reviews.sharding); в основной базе они есть.
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
         related_name='reviews',
-        verbose_name='Произведение'
+        verbose_name='Произведение',
     )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='reviews',
-        verbose_name='Автор'
+        verbose_name='Автор',
     )
     score = models.PositiveSmallIntegerField(
         verbose_name='Оценка',
@@ -203,13 +347,35 @@ class Review(models.Model):
                 fields=['author', 'title'],
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx',
+            ),
+        ]
         ordering = ('pub_date',)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные оценку и произведение для пересчёта."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        instance._loaded_title_id = instance.__dict__.get('title_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв и обновляет рейтинг в одной транзакции."""
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f'{self.author} оставил отзыв на {self.title}'
 
 
-class Comment(models.Model):
+class Comment(ShardedModel):
     review = models.ForeignKey(
         Review,
         on_delete=models.CASCADE,
@@ -220,7 +386,7 @@ class Comment(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='comments',
-        verbose_name='Автор'
+        verbose_name='Автор',
     )
     text = models.TextField(
         verbose_name='Комментарий'
@@ -233,7 +399,84 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx',
+            ),
+        ]
         ordering = ('pub_date',)
 
     def __str__(self):
         return f'Комментарий на {self.review} от {self.author}'
+
+
+class OutgoingEmail(models.Model):
+    """
+    Письмо в очереди на отправку командой send_emails. Код подтверждения
+    пользователя user создаётся только при отправке и в базе не хранится.
+    """
+    subject = models.CharField('Тема', max_length=MAX_NAME_LENGTH)
+    body = models.TextField(
+        'Текст',
+        help_text=(
+            f'{CONFIRMATION_CODE_PLACEHOLDER} заменяется кодом '
+            'подтверждения пользователя при отправке.'
+        ),
+    )
+    from_email = models.EmailField('Отправитель')
+    recipient = models.EmailField('Получатель')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='outgoing_emails',
+        verbose_name='Пользователь',
+    )
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    send_after = models.DateTimeField(
+        'Отправить не раньше', default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField(
+        'Количество попыток', default=0
+    )
+    sent_at = models.DateTimeField('Дата отправки', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=['sent_at', 'send_after'],
+                name='outgoing_email_queue_idx',
+            ),
+        ]
+        ordering = ('send_after', 'id')
+
+    def __str__(self):
+        return f'{self.subject} для {self.recipient}'
+
+    def render_body(self):
+        if self.user is None:
+            return self.body
+        return self.body.replace(
+            CONFIRMATION_CODE_PLACEHOLDER,
+            default_token_generator.make_token(self.user),
+        )
+
+
+class IdSequence(models.Model):
+    """Последовательность id записей, распределённых по шардам."""
+    name = models.CharField(
+        'Модель', max_length=MAX_NAME_LENGTH, primary_key=True
+    )
+    value = models.BigIntegerField('Последний выданный id', default=0)
+
+    class Meta:
+        verbose_name = 'Последовательность id'
+        verbose_name_plural = 'Последовательности id'
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
@@ -0,0 +1,274 @@
+"""
+Распределение отзывов и комментариев по базам (шардам) из настройки
+REVIEW_SHARDS по id произведения: все отзывы произведения и комментарии к
+ним хранятся в базе REVIEW_SHARDS[title_id % len(REVIEW_SHARDS)].
+Произведения, пользователи и остальные модели остаются в основной базе.
+
+ShardRouter выбирает шард по подсказкам ORM: по объекту произведения или
+отзыва (title.reviews, review.comments, сохранение и удаление объекта) и по
+фильтру по произведению (Review.objects.filter(title_id=...)), который
+ShardedQuerySet передаёт в подсказке title_id. Поэтому вьюсеты и пересчёт
+рейтинга работают с шардами так же, как с одной базой.
+
+id новых отзывов и комментариев выдаёт последовательность в основной базе
+(IdSequence), чтобы они не совпадали в разных шардах и не менялись при
+переносе командой rebalance_shards.
+
+Внешние ключи отзывов на произведения и пользователей ссылаются на записи
+основной базы, поэтому их ограничения удаляются только в базах шардов
+(DropShardConstraints); в основной базе они остаются.
+"""
+from django.conf import settings
+from django.db import (DEFAULT_DB_ALIAS, IntegrityError, migrations, models,
+                       transaction)
+
+SHARDED_MODELS = frozenset(('reviews.review', 'reviews.comment'))
+TITLE_LOOKUPS = {
+    'reviews.review': ('title', 'title_id', 'title__id', 'title__pk'),
+    'reviews.comment': (
+        'review__title', 'review__title_id', 'review__title__id',
+    ),
+}
+
+
+def get_shards():
+    return settings.REVIEW_SHARDS
+
+
+def get_databases():
+    """Базы, в которых могут лежать отзывы: основная и все шарды."""
+    return list(dict.fromkeys((DEFAULT_DB_ALIAS, *get_shards())))
+
+
+def get_title_shard(title_id):
+    shards = get_shards()
+    return shards[int(title_id) % len(shards)]
+
+
+def is_sharded(model):
+    return model._meta.label_lower in SHARDED_MODELS
+
+
+def get_instance_shard(instance):
+    """Шард, в котором лежат (или будут лежать) данные объекта."""
+    label = instance._meta.label_lower
+    if label == 'reviews.title':
+        return get_title_shard(instance.pk)
+    if label not in SHARDED_MODELS:
+        return None
+    # Новому объекту база назначается по первой присвоенной связи, поэтому
+    # для него шард определяется по произведению.
+    if not instance._state.adding and instance._state.db is not None:
+        return instance._state.db
+    if label == 'reviews.review':
+        return get_title_shard(instance.title_id)
+    review_field = instance._meta.get_field('review')
+    if review_field.is_cached(instance):
+        return get_instance_shard(instance.review)
+    return None
+
+
+def get_title_id(value):
+    """id произведения из значения фильтра: числа, произведения, отзыва."""
+    if isinstance(value, models.Model):
+        if value._meta.label_lower == 'reviews.review':
+            return value.title_id
+        return value.pk
+    return value
+
+
+class ShardRouter:
+    """
+    Направляет запросы к отзывам и комментариям в шард произведения.
+    Для остальных моделей и при пустой REVIEW_SHARDS решение принимают
+    следующие роутеры.
+    """
+
+    def get_shard(self, model, hints):
+        if not get_shards() or not is_sharded(model):
+            return None
+        if hints.get('title_id') is not None:
+            return get_title_shard(hints['title_id'])
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        return get_instance_shard(instance)
+
+    def db_for_read(self, model, **hints):
+        return self.get_shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self.get_shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Отзыв из шарда ссылается на произведение и автора из основной базы.
+        if get_shards() and (is_sharded(obj1) or is_sharded(obj2)):
+            return True
+        return None
+
+
+def is_local_path(model, path):
+    """Ведёт ли связь path через модели, хранящиеся в том же шарде."""
+    for name in path.split('__'):
+        model = model._meta.get_field(name).related_model
+        if model is None or not is_sharded(model):
+            return False
+    return True
+
+
+class ShardedQuerySet(models.QuerySet):
+    """
+    QuerySet отзывов и комментариев: фильтр по произведению становится
+    подсказкой для ShardRouter, а select_related моделей из основной базы
+    заменяется на prefetch_related, так как JOIN между базами невозможен.
+    """
+
+    def filter(self, *args, **kwargs):
+        queryset = super().filter(*args, **kwargs)
+        if self._db is None and get_shards():
+            for lookup in TITLE_LOOKUPS[self.model._meta.label_lower]:
+                if kwargs.get(lookup) is not None:
+                    queryset._add_hints(
+                        title_id=get_title_id(kwargs[lookup])
+                    )
+                    break
+            else:
+                review = kwargs.get('review')
+                if isinstance(review, models.Model):
+                    queryset._add_hints(instance=review)
+        return queryset
+
+    def create(self, **kwargs):
+        if self._db is not None or not get_shards():
+            return super().create(**kwargs)
+        # Шард определяется по самому объекту при сохранении.
+        instance = self.model(**kwargs)
+        instance.save(force_insert=True)
+        return instance
+
+    def select_related(self, *fields):
+        if not get_shards() or not fields or None in fields:
+            return super().select_related(*fields)
+        local = [
+            field for field in fields if is_local_path(self.model, field)
+        ]
+        remote = [field for field in fields if field not in local]
+        queryset = super().select_related(*local) if local else self._chain()
+        return queryset.prefetch_related(*remote) if remote else queryset
+
+
+def get_max_id(model):
+    return max(
+        model.objects.using(alias).aggregate(
+            max_id=models.Max('id')
+        )['max_id'] or 0
+        for alias in get_databases()
+    )
+
+
+def allocate_id(model):
+    """Следующий id для новой записи шардированной модели."""
+    from .models import IdSequence
+
+    name = model._meta.label_lower
+    while True:
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                sequences = IdSequence.objects.using(DEFAULT_DB_ALIAS)
+                if not sequences.filter(name=name).update(
+                    value=models.F('value') + 1
+                ):
+                    sequences.create(name=name, value=get_max_id(model) + 1)
+                return sequences.get(name=name).value
+        except IntegrityError:
+            # Последовательность одновременно создал другой процесс.
+            continue
+
+
+def sync_id_sequence(model):
+    """Поднимает последовательность до наибольшего id во всех базах."""
+    from .models import IdSequence
+
+    max_id = get_max_id(model)
+    sequence, _ = IdSequence.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+        name=model._meta.label_lower, defaults={'value': max_id}
+    )
+    if sequence.value < max_id:
+        sequence.value = max_id
+        sequence.save(update_fields=('value',))
+
+
+class DropShardConstraints(migrations.operations.base.Operation):
+    """
+    Удаляет ограничения внешних ключей names модели model_name в базах,
+    кроме основной: в шардах нет связанных произведений и пользователей.
+    Состояние моделей и схема основной базы не меняются. Поля одной модели
+    изменяются одной операцией, потому что SQLite пересоздаёт таблицу по
+    состоянию модели и вернул бы ограничения, удалённые отдельно.
+    """
+    reversible = True
+
+    def __init__(self, model_name, names):
+        self.model_name = model_name
+        self.names = tuple(names)
+
+    def deconstruct(self):
+        return self.__class__.__name__, [self.model_name, self.names], {}
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def get_steps(self, app_label, state):
+        """Изменения полей и состояния до и после каждого из них."""
+        steps = []
+        for name in self.names:
+            field = state.models[app_label, self.model_name].fields[
+                name
+            ].clone()
+            field.db_constraint = False
+            operation = migrations.AlterField(self.model_name, name, field)
+            altered = state.clone()
+            operation.state_forwards(app_label, altered)
+            steps.append((operation, state, altered))
+            state = altered
+        return steps
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.alias == DEFAULT_DB_ALIAS:
+            return
+        for operation, before, after in self.get_steps(app_label, to_state):
+            operation.database_forwards(
+                app_label, schema_editor, before, after
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.alias == DEFAULT_DB_ALIAS:
+            return
+        for operation, before, after in reversed(
+            self.get_steps(app_label, to_state)
+        ):
+            operation.database_forwards(
+                app_label, schema_editor, after, before
+            )
+
+    def describe(self):
+        return (
+            f'Drop {self.model_name} foreign key constraints '
+            f'{", ".join(self.names)} in shard databases'
+        )
+
+
+class ShardedModel(models.Model):
+    """Модель, записи которой распределяются по шардам произведений."""
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self.pk is None and get_shards():
+            self.pk = allocate_id(type(self))
+            kwargs['force_insert'] = True
+        super().save(*args, **kwargs)
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast, NullIf
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from .models import TOKEN_VERSION_CACHE_KEY, Comment, Review, Title, User
+from .sharding import get_shards, get_title_shard
+
+# Отправляется командами, которые меняют записи модели sender в обход
+# сигналов моделей (bulk_create, bulk_update).
+bulk_changed = Signal()
+# Наибольшее количество произведений в одном запросе сдвига рейтинга.
+RATING_BATCH_SIZE = 500
+
+rating_updates_suspended = ContextVar(
+    'rating_updates_suspended', default=False
+)
+pending_rating_shifts = ContextVar('pending_rating_shifts', default=None)
+
+
+@contextmanager
+def suspend_rating_updates():
+    """
+    Отключает пересчёт рейтинга при удалении отзывов, которые переносятся
+    в другую базу и продолжают учитываться в рейтинге, или удаляются вместе
+    с произведением.
+    """
+    token = rating_updates_suspended.set(True)
+    try:
+        yield
+    finally:
+        rating_updates_suspended.reset(token)
+
+
+@contextmanager
+def group_rating_updates():
+    """
+    Копит сдвиги рейтинга от удалённых отзывов и после успешного удаления
+    применяет их группами: произведения с одинаковым сдвигом обновляются
+    одним запросом.
+    """
+    if pending_rating_shifts.get() is not None:
+        yield
+        return
+    shifts = defaultdict(lambda: [0, 0])
+    token = pending_rating_shifts.set(shifts)
+    try:
+        yield
+    finally:
+        pending_rating_shifts.reset(token)
+    title_ids = defaultdict(list)
+    for title_id, shift in shifts.items():
+        title_ids[tuple(shift)].append(title_id)
+    for (score_delta, count_delta), ids in title_ids.items():
+        for start in range(0, len(ids), RATING_BATCH_SIZE):
+            shift_titles_rating(
+                Title.objects.filter(
+                    pk__in=ids[start:start + RATING_BATCH_SIZE]
+                ),
+                score_delta, count_delta,
+            )
+
+
+def shift_title_rating(title_id, score_delta, count_delta):
+    """Атомарно сдвигает сумму и количество оценок произведения."""
+    shift_titles_rating(
+        Title.objects.filter(pk=title_id), score_delta, count_delta
+    )
+
+
+def shift_titles_rating(titles, score_delta, count_delta):
+    """Одним запросом сдвигает сумму и количество оценок произведений."""
+    score_sum = F('score_sum') + score_delta
+    score_count = F('score_count') + count_delta
+    titles.update(
+        score_sum=score_sum,
+        score_count=score_count,
+        rating=Cast(score_sum, FloatField()) / NullIf(score_count, 0),
+    )
+
+
+def recalculate_title_rating(title_id):
+    """Пересчитывает рейтинг произведения по всем его отзывам."""
+    totals = Review.objects.filter(title_id=title_id).aggregate(
+        score_sum=Sum('score'), score_count=Count('id')
+    )
+    score_sum = totals['score_sum'] or 0
+    score_count = totals['score_count']
+    Title.objects.filter(pk=title_id).update(
+        score_sum=score_sum,
+        score_count=score_count,
+        rating=score_sum / score_count if score_count else None,
+    )
+
+
+def remember_loaded_state(review):
+    review._loaded_score = review.score
+    review._loaded_title_id = review.title_id
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw, **kwargs):
+    """Учитывает новый или изменённый отзыв в рейтинге произведения."""
+    if raw or rating_updates_suspended.get():
+        return
+    loaded_score = getattr(instance, '_loaded_score', None)
+    loaded_title_id = getattr(instance, '_loaded_title_id', None)
+    if created:
+        shift_title_rating(instance.title_id, instance.score, 1)
+    elif loaded_score is None or loaded_title_id is None:
+        recalculate_title_rating(instance.title_id)
+    elif loaded_title_id != instance.title_id:
+        shift_title_rating(loaded_title_id, -loaded_score, -1)
+        shift_title_rating(instance.title_id, instance.score, 1)
+    elif loaded_score != instance.score:
+        shift_title_rating(
+            instance.title_id, instance.score - loaded_score, 0
+        )
+    remember_loaded_state(instance)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """
+    Исключает удалённый отзыв из рейтинга. Срабатывает и при каскадном
+    удалении отзывов вместе с пользователем; при удалении произведения
+    рейтинг не пересчитывается (Title.delete).
+    """
+    if rating_updates_suspended.get():
+        return
+    score = getattr(instance, '_loaded_score', None)
+    if score is None:
+        score = instance.score
+    title_id = getattr(instance, '_loaded_title_id', None) or instance.title_id
+    shifts = pending_rating_shifts.get()
+    if shifts is None:
+        shift_title_rating(title_id, -score, -1)
+        return
+    shifts[title_id][0] -= score
+    shifts[title_id][1] -= 1
+
+
+@receiver(pre_delete, sender=Title)
+def delete_sharded_reviews_of_title(sender, instance, using, **kwargs):
+    """
+    Каскадное удаление Django находит только отзывы из базы произведения,
+    поэтому отзывы из его шарда удаляются отдельно.
+    """
+    if get_shards() and get_title_shard(instance.pk) != using:
+        Review.objects.filter(title_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_content_of_user(sender, instance, using, **kwargs):
+    """Удаляет отзывы и комментарии пользователя из остальных шардов."""
+    for alias in get_shards():
+        if alias != using:
+            Comment.objects.using(alias).filter(author_id=instance.pk).delete()
+            Review.objects.using(alias).filter(author_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_token_version(sender, instance, **kwargs):
+    """
+    Удаляет версию токенов пользователя из кэша после фиксации транзакции,
+    чтобы аутентификация прочитала её из базы.
+    """
+    key = TOKEN_VERSION_CACHE_KEY.format(instance.pk)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,21 @@
+from contextlib import contextmanager
+
+
+@contextmanager
+def keep_loaded_dates(*models):
+    """
+    Сохраняет значения полей auto_now_add моделей при bulk_create: иначе
+    в них записывается текущее время. Поля изменяются у классов моделей,
+    поэтому блок должен охватывать только вызов bulk_create.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
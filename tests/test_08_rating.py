@@ -0,0 +1,144 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title
+from tests.utils import create_reviews
+
+
+def count_rating_updates(queries):
+    return sum(
+        query['sql'].startswith('UPDATE "reviews_title"')
+        for query in queries.captured_queries
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_title(self, title_id):
+        return Title.objects.get(pk=title_id)
+
+    def test_01_rating_follows_reviews(self, admin_client, admin, user,
+                                       user_client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.score_count, title.rating) == (
+            10, 2, 5
+        ), (
+            'Проверьте, что при создании отзыва обновляются сохранённые '
+            'сумма, количество оценок и рейтинг произведения.'
+        )
+
+        review = Review.objects.get(pk=reviews[0]['id'])
+        review.score = 8
+        review.save()
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.score_count, title.rating) == (
+            13, 2, 6.5
+        ), (
+            'Проверьте, что при изменении оценки отзыва рейтинг '
+            'произведения пересчитывается.'
+        )
+
+        review.delete()
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.score_count, title.rating) == (
+            5, 1, 5
+        ), (
+            'Проверьте, что при удалении отзыва рейтинг произведения '
+            'пересчитывается.'
+        )
+
+        user.delete()
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.score_count, title.rating) == (
+            0, 0, None
+        ), (
+            'Проверьте, что при каскадном удалении отзывов вместе с '
+            'пользователем рейтинг произведения пересчитывается.'
+        )
+
+    def test_02_recalculate_ratings(self, admin_client, admin, user,
+                                    user_client):
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        Title.objects.update(score_sum=0, score_count=0, rating=None)
+        Review.objects.filter(author=user).update(score=1)
+
+        call_command('recalculate_ratings')
+
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.score_count, title.rating) == (
+            6, 2, 3
+        ), (
+            'Проверьте, что команда `recalculate_ratings` восстанавливает '
+            'рейтинг произведений по существующим отзывам.'
+        )
+        title = self.get_title(titles[1]['id'])
+        assert title.rating is None, (
+            'Проверьте, что команда `recalculate_ratings` оставляет пустым '
+            'рейтинг произведения без отзывов.'
+        )
+
+    def test_03_title_save_keeps_rating(self, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        stale = self.get_title(title.id)
+        Review.objects.create(title=title, author=user, text='Отзыв', score=7)
+        stale.name = 'Новое название'
+        stale.save()
+        title = self.get_title(title.id)
+        assert (title.name, title.score_sum, title.score_count) == (
+            'Новое название', 7, 1
+        ), (
+            'Проверьте, что сохранение произведения не перезаписывает '
+            'рейтинг, обновлённый отзывом после загрузки произведения.'
+        )
+        assert title.rating == 7
+
+    def test_04_cascade_rating_queries(self, django_user_model, user):
+        authors = [
+            django_user_model.objects.create_user(
+                username=f'author{number}', email=f'author{number}@yamdb.fake'
+            )
+            for number in range(5)
+        ]
+        titles = [
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+            for number in range(5)
+        ]
+        for title in titles:
+            for author in authors:
+                Review.objects.create(
+                    title=title, author=author, text='Отзыв', score=4
+                )
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=10
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            titles[0].delete()
+        assert not count_rating_updates(queries), (
+            'Проверьте, что удаление произведения не пересчитывает рейтинг '
+            'удаляемого произведения для каждого его отзыва.'
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            user.delete()
+        assert count_rating_updates(queries) == 1, (
+            'Проверьте, что при удалении пользователя рейтинг произведений '
+            'сдвигается сгруппированными запросами, а не по запросу на отзыв.'
+        )
+        assert set(
+            Title.objects.values_list('score_sum', 'score_count', 'rating')
+        ) == {(20, 5, 4)}
+
+        Title.objects.filter(pk=titles[1].pk).delete()
+        django_user_model.objects.filter(pk=authors[0].pk).delete()
+        assert set(
+            Title.objects.values_list('score_sum', 'score_count', 'rating')
+        ) == {(16, 4, 4)}
@@ -0,0 +1,44 @@
+import pytest
+from rest_framework.pagination import PageNumberPagination
+
+from reviews.models import Title
+from tests.utils import create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    # COUNT(*), страница произведений с категориями, жанры страницы.
+    EXPECTED_QUERIES = 3
+
+    @pytest.mark.parametrize('page_size', (10, 100, 1000))
+    def test_01_title_list_query_budget(self, client, monkeypatch,
+                                        django_assert_num_queries,
+                                        page_size):
+        create_catalog(page_size)
+        monkeypatch.setattr(PageNumberPagination, 'page_size', page_size)
+
+        with django_assert_num_queries(self.EXPECTED_QUERIES):
+            response = client.get(self.TITLES_URL)
+
+        results = response.json()['results']
+        assert len(results) == page_size, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` возвращает '
+            'полную страницу произведений.'
+        )
+        assert all(
+            title['category'] and len(title['genre']) == 2
+            for title in results
+        ), (
+            f'Проверьте, что ответ на GET-запрос к `{self.TITLES_URL}` '
+            'содержит категорию и жанры каждого произведения.'
+        )
+
+    def test_02_title_detail_query_budget(self, client,
+                                          django_assert_num_queries):
+        create_catalog(1)
+        title = Title.objects.get()
+
+        with django_assert_num_queries(2):
+            client.get(f'{self.TITLES_URL}{title.id}/')
@@ -0,0 +1,116 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Comment, Review, Title
+from tests.utils import create_catalog
+
+
+def collect_pages(client, url):
+    results = []
+    pages = 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` с параметром `cursor` '
+            'возвращает ответ со статусом 200.'
+        )
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что в курсорном режиме пагинации ответ не содержит '
+            'ключ `count`.'
+        )
+        results.extend(data['results'])
+        url = data['next']
+        pages += 1
+    return results, pages
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def test_01_title_cursor(self, client):
+        create_catalog(25)
+        Title.objects.filter(name__endswith='1').update(name='Дубликат')
+
+        results, pages = collect_pages(client, f'{self.TITLES_URL}?cursor=')
+
+        expected = list(
+            Title.objects.order_by('name', 'id').values_list('id', flat=True)
+        )
+        assert [title['id'] for title in results] == expected, (
+            f'Проверьте, что курсорная пагинация `{self.TITLES_URL}` '
+            'возвращает все произведения без повторов в порядке `name`, `id`.'
+        )
+        assert pages == 3
+
+    def test_02_title_page_number_mode_kept(self, client):
+        create_catalog(25)
+
+        data = client.get(f'{self.TITLES_URL}?page=3').json()
+        assert data['count'] == 25 and len(data['results']) == 5, (
+            f'Проверьте, что без параметра `cursor` эндпоинт '
+            f'`{self.TITLES_URL}` сохраняет постраничную пагинацию.'
+        )
+
+    def test_03_review_cursor(self, client, django_user_model):
+        create_catalog(1)
+        title = Title.objects.get()
+        for idx in range(15):
+            author = django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text='text', score=5
+            )
+
+        results, pages = collect_pages(
+            client,
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id) + '?cursor='
+        )
+
+        expected = list(
+            title.reviews.order_by('pub_date', 'id')
+            .values_list('id', flat=True)
+        )
+        assert [review['id'] for review in results] == expected, (
+            'Проверьте, что курсорная пагинация отзывов возвращает все '
+            'отзывы без повторов в порядке `pub_date`, `id`.'
+        )
+        assert pages == 2
+
+    def test_04_comment_modes_same_order(self, client, user):
+        create_catalog(1)
+        title = Title.objects.get()
+        review = Review.objects.create(
+            title=title, author=user, text='text', score=5
+        )
+        for _ in range(15):
+            Comment.objects.create(review=review, author=user, text='text')
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=title.id, review_id=review.id
+        )
+
+        cursor_results, _ = collect_pages(client, f'{url}?cursor=')
+        page_results = []
+        page_url = url
+        while page_url:
+            data = client.get(page_url).json()
+            page_results.extend(data['results'])
+            page_url = data['next']
+
+        expected = list(
+            review.comments.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        assert [comment['id'] for comment in page_results] == expected
+        assert [comment['id'] for comment in cursor_results] == expected, (
+            'Проверьте, что курсорная и постраничная пагинация комментариев '
+            'возвращают их в одном порядке: новые первыми.'
+        )
@@ -0,0 +1,54 @@
+import pytest
+
+from reviews.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def search(self, client, query):
+        response = client.get(self.TITLES_URL, {'search': query})
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_prefix_and_rank(self, client):
+        Title.objects.create(
+            name='Крепкий орешек', year=1988,
+            description='Полицейский против террористов'
+        )
+        Title.objects.create(
+            name='Терминатор', year=1984,
+            description='Терминатор из будущего охотится на Сару'
+        )
+        Title.objects.create(
+            name='Чужой', year=1979,
+            description='Экипаж встречает терминатора-андроида'
+        )
+
+        assert self.search(client, 'термин') == ['Терминатор', 'Чужой'], (
+            f'Проверьте, что параметр `search` эндпоинта `{self.TITLES_URL}` '
+            'ищет по префиксам слов в названии и описании и сортирует '
+            'результаты по релевантности.'
+        )
+        assert self.search(client, 'КРЕП ореш') == ['Крепкий орешек'], (
+            'Проверьте, что поиск не зависит от регистра и требует '
+            'совпадения всех слов запроса.'
+        )
+
+    def test_02_search_index_in_sync(self, client):
+        title = Title.objects.create(name='Матрица', year=1999)
+        title.name = 'Начало'
+        title.save()
+
+        assert self.search(client, 'матрица') == []
+        assert self.search(client, 'начало') == ['Начало'], (
+            'Проверьте, что индекс поиска обновляется при изменении '
+            'произведения.'
+        )
+
+        title.delete()
+        assert self.search(client, 'начало') == [], (
+            'Проверьте, что индекс поиска обновляется при удалении '
+            'произведения.'
+        )
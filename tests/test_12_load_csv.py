@@ -0,0 +1,173 @@
+import csv
+import shutil
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.utils.dateparse import parse_datetime
+
+from reviews.management.commands import load_csv
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleGenre, User)
+
+DATA_FILES = (
+    (User, 'users.csv'),
+    (Genre, 'genre.csv'),
+    (Category, 'category.csv'),
+    (Title, 'titles.csv'),
+    (TitleGenre, 'genre_title.csv'),
+    (Review, 'review.csv'),
+    (Comment, 'comments.csv'),
+)
+
+
+def call_load_csv(tmp_path, **options):
+    call_command(
+        'load_csv', checkpoint=tmp_path / 'checkpoint.json', **options
+    )
+
+
+def check_loaded():
+    for model, filename in DATA_FILES:
+        assert model.objects.count() == count_rows(filename), (
+            f'Проверьте, что команда `load_csv` загружает все строки '
+            f'файла `{filename}` ровно один раз.'
+        )
+
+
+def edit_csv(path, change, extra=()):
+    with open(path, 'r', encoding='utf8') as file:
+        reader = csv.DictReader(file)
+        fieldnames = reader.fieldnames
+        rows = [change(row) for row in reader]
+    with open(path, 'w', encoding='utf8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames)
+        writer.writeheader()
+        writer.writerows(row for row in rows if row is not None)
+        writer.writerows(extra)
+
+
+def read_first_row(filename):
+    path = settings.BASE_DIR / 'static/data' / filename
+    with open(path, 'r', encoding='utf8') as file:
+        return next(csv.DictReader(file))
+
+
+def count_rows(filename):
+    path = settings.BASE_DIR / 'static/data' / filename
+    with open(path, 'r', encoding='utf8') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12LoadCsv:
+
+    def test_01_load_csv(self, tmp_path):
+        call_load_csv(tmp_path)
+        call_load_csv(tmp_path)
+
+        check_loaded()
+        for model, filename in ((Review, 'review.csv'),
+                                (Comment, 'comments.csv')):
+            row = read_first_row(filename)
+            assert model.objects.get(pk=row['id']).pub_date == parse_datetime(
+                row['pub_date']
+            ), (
+                f'Проверьте, что команда `load_csv` сохраняет даты '
+                f'публикации из файла `{filename}`.'
+            )
+        title = Title.objects.filter(reviews__isnull=False).first()
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.rating == sum(scores) / len(scores), (
+            'Проверьте, что после загрузки отзывов командой `load_csv` '
+            'рейтинг произведений пересчитывается.'
+        )
+
+    def test_02_load_csv_workers(self, tmp_path):
+        call_load_csv(tmp_path, workers=2, chunk_size=7)
+
+        check_loaded()
+
+    def test_03_load_csv_resume(self, tmp_path, monkeypatch):
+        insert_rows = load_csv.insert_rows
+        saved_chunks = []
+
+        def interrupted_insert_rows(model, columns, rows, *args, **kwargs):
+            if model is Review:
+                if len(saved_chunks) == 3:
+                    raise KeyboardInterrupt
+                saved_chunks.append(len(rows))
+            return insert_rows(model, columns, rows, *args, **kwargs)
+
+        monkeypatch.setattr(
+            load_csv, 'insert_rows', interrupted_insert_rows
+        )
+        with pytest.raises(KeyboardInterrupt):
+            call_load_csv(tmp_path, chunk_size=10)
+        monkeypatch.undo()
+        assert Review.objects.count() == sum(saved_chunks)
+
+        call_load_csv(tmp_path, chunk_size=10, resume=True)
+
+        check_loaded()
+        assert Title.objects.filter(rating__isnull=False).exists(), (
+            'Проверьте, что после продолжения загрузки отзывов рейтинг '
+            'произведений пересчитывается.'
+        )
+
+    def test_04_load_csv_upsert(self, tmp_path, capsys):
+        data_dir = tmp_path / 'data'
+        shutil.copytree(settings.BASE_DIR / 'static/data', data_dir)
+        call_load_csv(tmp_path)
+        title = Title.objects.order_by('id').first()
+        review = Review.objects.order_by('id').first()
+        comment = Comment.objects.order_by('id').first()
+
+        edit_csv(data_dir / 'titles.csv', lambda row: (
+            {**row, 'name': 'Новое название'}
+            if row['id'] == str(title.id) else row
+        ))
+        edit_csv(data_dir / 'review.csv', lambda row: (
+            {**row, 'score': '1'} if row['id'] == str(review.id) else row
+        ))
+        edit_csv(data_dir / 'comments.csv', lambda row: (
+            None if row['id'] == str(comment.id) else row
+        ))
+        edit_csv(data_dir / 'genre.csv', lambda row: row, extra=[
+            {'id': '1000', 'name': 'Новый жанр', 'slug': 'new-genre'}
+        ])
+        capsys.readouterr()
+
+        call_load_csv(
+            tmp_path, data_dir=data_dir, upsert=True, delete_missing=True
+        )
+
+        output = capsys.readouterr().out
+        for report in (
+            'Title синхронизированы: добавлено 0, обновлено 1',
+            'Review синхронизированы: добавлено 0, обновлено 1',
+            'Genre синхронизированы: добавлено 1, обновлено 0',
+            'Comment синхронизированы: добавлено 0, обновлено 0',
+            'User синхронизированы: добавлено 0, обновлено 0',
+        ):
+            assert report in output, (
+                'Проверьте, что команда `load_csv --upsert` добавляет новые и '
+                'обновляет только изменившиеся строки. Ожидалось: '
+                f'`{report}`.'
+            )
+        assert Title.objects.get(pk=title.id).name == 'Новое название'
+        assert not Comment.objects.filter(pk=comment.id).exists(), (
+            'Проверьте, что `load_csv --upsert --delete-missing` удаляет '
+            'записи, которых нет в csv.'
+        )
+        scores = list(
+            Review.objects.filter(title_id=review.title_id)
+            .values_list('score', flat=True)
+        )
+        assert (
+            Title.objects.get(pk=review.title_id).rating
+            == sum(scores) / len(scores)
+        ), (
+            'Проверьте, что после синхронизации отзывов рейтинг '
+            'произведений пересчитывается.'
+        )
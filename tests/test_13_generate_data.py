@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, Max, Min
+
+from reviews.models import Comment, Review, Title, TitleGenre, User
+
+OPTIONS = {
+    'users': 50, 'categories': 3, 'genres': 5, 'titles': 40,
+    'reviews': 400, 'comments': 300, 'chunk_size': 100,
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13GenerateData:
+
+    def check_dataset(self):
+        assert User.objects.count() == OPTIONS['users']
+        assert Title.objects.count() == OPTIONS['titles']
+        assert TitleGenre.objects.values('title').distinct().count() == (
+            OPTIONS['titles']
+        ), 'Проверьте, что у каждого произведения есть жанры.'
+        reviews = Review.objects.count()
+        comments = Comment.objects.count()
+        assert abs(reviews - OPTIONS['reviews']) < OPTIONS['reviews'] * 0.2
+        assert abs(comments - OPTIONS['comments']) < OPTIONS['comments'] * 0.2
+        per_title = sorted(
+            Title.objects.annotate(count=Count('reviews'))
+            .values_list('count', flat=True),
+            reverse=True,
+        )
+        assert per_title[0] > 3 * per_title[len(per_title) // 2], (
+            'Проверьте, что отзывы распределяются по произведениям '
+            'неравномерно.'
+        )
+        assert Title.objects.filter(rating__isnull=False).exists()
+        for model in (Review, Comment):
+            dates = model.objects.aggregate(
+                first=Min('pub_date'), last=Max('pub_date')
+            )
+            assert dates['last'] - dates['first'] > timedelta(days=30), (
+                'Проверьте, что даты публикации сгенерированных отзывов и '
+                'комментариев распределены во времени, а не равны времени '
+                'загрузки.'
+            )
+
+    def test_01_generate_to_db(self):
+        call_command('generate_data', **OPTIONS)
+
+        self.check_dataset()
+
+    def test_02_generate_to_csv(self, tmp_path):
+        call_command('generate_data', output_dir=tmp_path / 'data', **OPTIONS)
+        assert not User.objects.exists(), (
+            'Проверьте, что с опцией `--output-dir` команда `generate_data` '
+            'не записывает данные в базу.'
+        )
+
+        call_command(
+            'load_csv', data_dir=tmp_path / 'data',
+            checkpoint=tmp_path / 'checkpoint.json'
+        )
+
+        self.check_dataset()
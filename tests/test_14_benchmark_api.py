@@ -0,0 +1,39 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14BenchmarkApi:
+
+    def test_01_benchmark_baseline(self, tmp_path):
+        call_command(
+            'generate_data', users=20, titles=20, reviews=100, comments=50
+        )
+        baseline_path = tmp_path / 'baseline.json'
+
+        call_command(
+            'benchmark_api', repeat=2, baseline=baseline_path,
+            save_baseline=True
+        )
+
+        with open(baseline_path, encoding='utf8') as file:
+            baseline = json.load(file)
+        for name in (
+            'titles', 'titles?name+category+genre+year', 'title_detail',
+            'reviews', 'comments', 'signup', 'token'
+        ):
+            assert set(baseline.get(name, ())) == {
+                'p50_ms', 'p95_ms', 'queries', 'bytes'
+            }, (
+                'Проверьте, что команда `benchmark_api` сохраняет задержку, '
+                f'количество SQL запросов и размер ответа для `{name}`.'
+            )
+
+        baseline['title_detail']['queries'] -= 1
+        with open(baseline_path, 'w', encoding='utf8') as file:
+            json.dump(baseline, file)
+        with pytest.raises(CommandError, match='title_detail: queries'):
+            call_command('benchmark_api', repeat=2, baseline=baseline_path)
@@ -0,0 +1,74 @@
+import json
+import logging
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api.v1.views import TitleViewSet
+from reviews.models import Title
+from tests.utils import create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ServerTiming:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def parse_header(self, header):
+        metrics = {}
+        for metric in header.split(', '):
+            name, *params = metric.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+        return metrics
+
+    def test_01_disabled_by_default(self, client):
+        response = client.get(self.TITLES_URL)
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что заголовок `Server-Timing` не добавляется, пока '
+            'настройка `SERVER_TIMING_ENABLED` выключена.'
+        )
+
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_02_server_timing(self, caplog):
+        create_catalog(5)
+        title = Title.objects.first()
+
+        with caplog.at_level(logging.INFO, logger='api.server_timing'):
+            response = APIClient().get(f'{self.TITLES_URL}{title.id}/')
+
+        metrics = self.parse_header(response['Server-Timing'])
+        assert set(metrics) == {'db', 'serializer', 'view', 'total'}, (
+            'Проверьте, что заголовок `Server-Timing` содержит время SQL '
+            'запросов, сериализации, view и общее время.'
+        )
+        assert metrics['db']['desc'] == '"2 queries"'
+        assert (
+            float(metrics['total']['dur']) >= float(metrics['view']['dur'])
+            >= float(metrics['serializer']['dur']) > 0
+        )
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['path'] == f'{self.TITLES_URL}{title.id}/'
+        assert record['status'] == 200 and record['db_queries'] == 2, (
+            'Проверьте, что метрики запроса записываются в лог '
+            '`api.server_timing`.'
+        )
+
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_03_view_called_by_django(self, monkeypatch):
+        monkeypatch.setitem(connection.settings_dict, 'ATOMIC_REQUESTS', True)
+        atomic = []
+        original = TitleViewSet.list
+
+        def list_titles(self, request, *args, **kwargs):
+            atomic.append(connection.in_atomic_block)
+            return original(self, request, *args, **kwargs)
+
+        monkeypatch.setattr(TitleViewSet, 'list', list_titles)
+        response = APIClient().get(self.TITLES_URL)
+        assert 'Server-Timing' in response
+        assert atomic == [True], (
+            'Проверьте, что view вызывает Django, а не middleware: иначе '
+            'не действует `ATOMIC_REQUESTS`.'
+        )
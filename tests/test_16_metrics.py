@@ -0,0 +1,72 @@
+import multiprocessing
+
+import pytest
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api import metrics
+from api.metrics import MetricsRegistry
+
+
+def record_in_worker(registry):
+    registry.record_request('titles', 'GET', 200, 0.02, 500, 3)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Metrics:
+
+    def test_01_metrics_disabled(self, client):
+        assert client.get('/metrics').status_code == 404
+
+    def test_02_metrics_aggregate_processes(self, tmp_path):
+        registry = MetricsRegistry(tmp_path)
+        registry.record_request('titles', 'GET', 200, 0.02, 500, 3)
+        registry.record_request('titles', 'GET', 500, 3, 50, 1)
+        worker = multiprocessing.get_context('fork').Process(
+            target=record_in_worker, args=(registry,)
+        )
+        worker.start()
+        worker.join()
+
+        output = registry.render()
+        for line in (
+            'yamdb_http_requests_total{route="titles",method="GET",'
+            'status="2xx"} 2',
+            'yamdb_http_requests_total{route="titles",method="GET",'
+            'status="5xx"} 1',
+            'yamdb_http_request_duration_seconds_bucket{route="titles",'
+            'method="GET",le="0.025"} 2',
+            'yamdb_http_request_duration_seconds_bucket{route="titles",'
+            'method="GET",le="+Inf"} 3',
+            'yamdb_http_request_duration_seconds_count{route="titles",'
+            'method="GET"} 3',
+            'yamdb_db_queries_per_request_sum{route="titles"} 7',
+        ):
+            assert line in output, (
+                'Проверьте, что метрики всех процессов суммируются. '
+                f'Не найдена строка `{line}`.'
+            )
+
+    def test_03_metrics_endpoint(self, tmp_path, monkeypatch, admin):
+        monkeypatch.setattr(metrics, '_registry', None)
+        with override_settings(METRICS_ENABLED=True, METRICS_DIR=tmp_path):
+            client = APIClient()
+            client.get('/api/v1/titles/')
+            client.get('/api/v1/titles/1/reviews/')
+            client.get(f'/api/v1/users/{admin.username}/')
+            response = client.get('/metrics')
+
+        assert response.status_code == 200
+        output = response.content.decode()
+        for line in (
+            'yamdb_http_requests_total{route="titles",method="GET",'
+            'status="2xx"} 1',
+            'yamdb_http_requests_total{route="reviews",method="GET",'
+            'status="4xx"} 1',
+            'yamdb_http_requests_total{route="users",method="GET",'
+            'status="4xx"} 1',
+        ):
+            assert line in output, (
+                'Проверьте, что эндпоинт `/metrics` учитывает запросы по '
+                f'маршрутам router_v1. Не найдена строка `{line}`.'
+            )
@@ -0,0 +1,67 @@
+import json
+import logging
+
+import pytest
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from reviews.models import Title
+from tests.utils import create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17SlowQueryLog:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_disabled_by_default(self, client, caplog):
+        with caplog.at_level(logging.WARNING, logger='api.slow_queries'):
+            client.get(self.TITLES_URL)
+        assert not caplog.records, (
+            'Проверьте, что медленные запросы не записываются в лог, пока '
+            'настройка `SLOW_QUERY_LOG_ENABLED` выключена.'
+        )
+
+    @override_settings(SLOW_QUERY_LOG_ENABLED=True, SLOW_QUERY_THRESHOLD_MS=0)
+    def test_02_slow_query_explain(self, caplog, monkeypatch):
+        # Файл журнала не пишется: записи проверяются через caplog.
+        monkeypatch.setattr(
+            logging.getLogger('api.slow_queries'), 'handlers', []
+        )
+        create_catalog(5)
+        title = Title.objects.first()
+
+        with caplog.at_level(logging.WARNING, logger='api.slow_queries'):
+            APIClient().get(
+                self.TITLES_URL, {'genre': title.genre.first().slug}
+            )
+            APIClient().get(f'{self.TITLES_URL}{title.id}/reviews/')
+
+        titles, reviews = [
+            json.loads(record.getMessage()) for record in caplog.records
+        ]
+        assert titles['view'] == 'api.v1.views.TitleViewSet', (
+            'Проверьте, что в лог записывается view, выполнившее запрос.'
+        )
+        assert reviews['view'] == 'api.v1.views.ReviewViewSet'
+        assert titles['db_queries'] == 3 and titles['queries']
+        for query in titles['queries']:
+            assert query['sql'].startswith('SELECT') and query['plan'], (
+                'Проверьте, что для SQL запросов записывается план '
+                'выполнения `EXPLAIN QUERY PLAN`.'
+            )
+        plans = ' '.join(
+            ' '.join(query['plan']) for query in titles['queries']
+        )
+        assert 'reviews_title' in plans and 'reviews_titlegenre' in plans
+
+    @override_settings(
+        SLOW_QUERY_LOG_ENABLED=True, SLOW_QUERY_THRESHOLD_MS=10 ** 6
+    )
+    def test_03_fast_requests_not_logged(self, caplog):
+        with caplog.at_level(logging.WARNING, logger='api.slow_queries'):
+            APIClient().get(self.TITLES_URL)
+        assert not caplog.records, (
+            'Проверьте, что в лог попадают только запросы дольше '
+            '`SLOW_QUERY_THRESHOLD_MS`.'
+        )
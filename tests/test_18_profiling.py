@@ -0,0 +1,49 @@
+import marshal
+import pstats
+
+import pytest
+
+from tests.utils import create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18Profiling:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_profile_table(self, admin_client):
+        create_catalog(5)
+        response = admin_client.get(
+            self.TITLES_URL, {'profile': 'table', 'profile_limit': 200}
+        )
+        assert response.status_code == 200
+        assert response['X-Profiled-Status'] == '200'
+        content = response.content.decode()
+        assert 'cumulative' in content and 'serializers.py' in content, (
+            'Проверьте, что при `?profile=table` админ получает таблицу '
+            'самых долгих функций запроса.'
+        )
+
+    def test_02_profile_download(self, admin_client, tmp_path):
+        response = admin_client.get(self.TITLES_URL, {'profile': 'prof'})
+        assert response['Content-Disposition'] == (
+            'attachment; filename="request.prof"'
+        ), 'Проверьте, что при `?profile=prof` возвращается файл `.prof`.'
+        path = tmp_path / 'request.prof'
+        path.write_bytes(response.content)
+        stats = pstats.Stats(str(path))
+        assert stats.total_calls > 0
+        assert isinstance(marshal.loads(response.content), dict)
+
+    def test_03_profile_only_for_admin(self, client, user_client,
+                                       moderator_client):
+        for api_client in (client, user_client, moderator_client):
+            response = api_client.get(self.TITLES_URL, {'profile': 'table'})
+            assert 'X-Profiled-Status' not in response, (
+                'Проверьте, что профилирование доступно только админу.'
+            )
+            assert response.json()['results'] == []
+
+    def test_04_profile_only_api(self, admin_client):
+        response = admin_client.get('/redoc/', {'profile': 'table'})
+        assert 'X-Profiled-Status' not in response
@@ -0,0 +1,161 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.management.commands import send_emails
+from reviews.models import OutgoingEmail
+
+
+class CountingBackend(EmailBackend):
+    """Считает открытия подключения; письма на fail@... не отправляются."""
+
+    opened = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.is_open = False
+
+    def open(self):
+        if self.is_open:
+            return False
+        CountingBackend.opened += 1
+        self.is_open = True
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(address.startswith('fail') for address in message.to):
+                raise ConnectionError('Сервер недоступен')
+        return super().send_messages(messages)
+
+
+def enqueue(recipient):
+    return OutgoingEmail.objects.create(
+        subject='Тема', body='Текст', from_email='admin@yamdb.com',
+        recipient=recipient,
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19EmailOutbox:
+
+    @pytest.fixture(autouse=True)
+    def counting_backend(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_19_email_outbox.CountingBackend'
+
+    def test_01_signup_enqueues_email(self, client):
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'queued', 'email': 'queued@yamdb.fake',
+        })
+        assert response.status_code == 200
+        assert not mail.outbox, (
+            'Проверьте, что эндпоинт `/api/v1/auth/signup/` не отправляет '
+            'письмо во время запроса.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == 'queued@yamdb.fake'
+        assert 'проверочный код' in email.body, (
+            'Проверьте, что письмо с кодом подтверждения ставится в очередь.'
+        )
+        assert email.user.username == 'queued'
+
+        call_command('send_emails', '--once')
+
+        assert len(mail.outbox) == 1 and mail.outbox[0].to == [
+            'queued@yamdb.fake'
+        ]
+        email = OutgoingEmail.objects.get()
+        assert email.sent_at is not None
+        code = mail.outbox[0].body.rsplit(' ', 1)[-1]
+        assert code not in email.body, (
+            'Проверьте, что код подтверждения не хранится в очереди писем.'
+        )
+        response = client.post('/api/v1/auth/token/', {
+            'username': 'queued', 'confirmation_code': code,
+        })
+        assert response.status_code == 200, (
+            'Проверьте, что код подтверждения, подставленный при отправке '
+            'письма, позволяет получить токен.'
+        )
+
+    def test_02_batches_reuse_connection(self):
+        CountingBackend.opened = 0
+        for number in range(25):
+            enqueue(f'user{number}@yamdb.fake')
+
+        call_command('send_emails', '--once', '--batch-size', '10')
+
+        assert len(mail.outbox) == 25
+        assert not OutgoingEmail.objects.filter(sent_at=None).exists()
+        assert CountingBackend.opened == 1, (
+            'Проверьте, что команда `send_emails` отправляет все пачки '
+            'писем через одно подключение.'
+        )
+
+    def test_03_retry_with_backoff(self):
+        failing = enqueue('fail@yamdb.fake')
+        enqueue('ok@yamdb.fake')
+
+        call_command('send_emails', '--once', '--backoff', '60')
+
+        failing.refresh_from_db()
+        assert len(mail.outbox) == 1 and failing.sent_at is None
+        assert failing.attempts == 1 and 'ConnectionError' in (
+            failing.last_error
+        )
+        delay = failing.send_after - timezone.now()
+        assert timedelta(seconds=50) < delay <= timedelta(seconds=60), (
+            'Проверьте, что неотправленное письмо откладывается на время '
+            '`--backoff`.'
+        )
+
+        call_command('send_emails', '--once', '--backoff', '60')
+        failing.refresh_from_db()
+        assert failing.attempts == 1, (
+            'Проверьте, что письмо не отправляется повторно раньше времени.'
+        )
+
+        OutgoingEmail.objects.filter(id=failing.id).update(
+            send_after=timezone.now()
+        )
+        call_command('send_emails', '--once', '--backoff', '60')
+        failing.refresh_from_db()
+        delay = failing.send_after - timezone.now()
+        assert failing.attempts == 2
+        assert timedelta(seconds=110) < delay <= timedelta(seconds=120), (
+            'Проверьте, что задержка перед повтором удваивается.'
+        )
+
+        OutgoingEmail.objects.filter(id=failing.id).update(
+            send_after=timezone.now()
+        )
+        call_command('send_emails', '--once', '--max-attempts', '2')
+        failing.refresh_from_db()
+        assert failing.attempts == 2, (
+            'Проверьте, что после `--max-attempts` попыток письмо больше '
+            'не отправляется.'
+        )
+
+    def test_04_workers_claim_disjoint_batches(self):
+        for number in range(6):
+            enqueue(f'user{number}@yamdb.fake')
+        first, second = send_emails.Command(), send_emails.Command()
+        for command in (first, second):
+            command.options = {'batch_size': 4, 'max_attempts': 5}
+
+        ready = first.find_ready()
+        claimed = second.claim(second.find_ready())
+        assert len(claimed) == 4
+        assert {email.id for email in first.claim(ready)} == (
+            {email.id for email in ready} - {email.id for email in claimed}
+        ), (
+            'Проверьте, что письма, которые закрепил другой обработчик, '
+            'не попадают в пачку `send_emails`.'
+        )
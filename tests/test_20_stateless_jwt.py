@@ -0,0 +1,105 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import Review, Title
+from tests.utils import get_client
+
+
+def user_table_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if '"reviews_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20StatelessJWT:
+
+    def test_01_token_claims(self, client, admin):
+        response = client.post('/api/v1/auth/token/', {
+            'username': admin.username,
+            'confirmation_code': default_token_generator.make_token(admin),
+        })
+        token = AccessToken(response.json()['token'])
+        assert token['username'] == admin.username
+        assert token['role'] == 'admin' and token['ver'] == 0, (
+            'Проверьте, что токен, выданный эндпоинтом '
+            '`/api/v1/auth/token/`, содержит роль и версию токенов.'
+        )
+        assert token['is_staff'] is False and token['is_superuser'] is False
+
+    def test_02_permissions_without_user_lookup(self, admin):
+        client = get_client(admin)
+        client.post('/api/v1/categories/', {'name': 'Фильм', 'slug': 'film'})
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                '/api/v1/categories/', {'name': 'Книга', 'slug': 'book'}
+            )
+        assert response.status_code == 201
+        assert not user_table_queries(context), (
+            'Проверьте, что при аутентификации по токену с claims '
+            'пользователь не загружается из базы.'
+        )
+
+    def test_03_author_permissions(self, user, moderator):
+        title = Title.objects.create(name='Произведение', year=2000)
+        response = get_client(user).post(
+            f'/api/v1/titles/{title.id}/reviews/', {'text': 'Отзыв', 'score': 5}
+        )
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+        review = Review.objects.get()
+        assert review.author == user
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        assert get_client(moderator).patch(
+            url, {'text': 'Модератор'}
+        ).status_code == 200
+        stranger = type(user).objects.create_user(
+            username='stranger', email='stranger@yamdb.fake'
+        )
+        assert get_client(stranger).patch(
+            url, {'text': 'Чужой'}
+        ).status_code == 403
+        assert get_client(user).delete(url).status_code == 204
+
+    def test_04_role_change_rejects_token(self, admin_client, user):
+        client = get_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        assert client.get('/api/v1/users/').status_code == 403
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', {'role': 'admin'}
+        )
+        assert response.status_code == 200
+
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что после смены роли выданные ранее токены '
+            'отклоняются.'
+        )
+        user.refresh_from_db()
+        assert get_client(user).get('/api/v1/users/').status_code == 200
+
+    def test_05_revoke_tokens(self, user):
+        client = get_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        user.revoke_tokens()
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что `User.revoke_tokens` отзывает выданные токены.'
+        )
+        assert get_client(user).get('/api/v1/users/me/').status_code == 200
+
+        legacy = APIClient()
+        legacy.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        assert legacy.get('/api/v1/users/me/').status_code == 401
+
+    def test_06_deleted_user_rejected(self, user):
+        client = get_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        user.delete()
+        assert client.get('/api/v1/titles/').status_code == 401
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+from django.core.management import call_command
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from api.v1 import authentication
+from api.v1.authentication import ClaimsAccessToken, TokenCache, token_cache
+from tests.utils import get_client, get_token_client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21TokenCache:
+
+    @pytest.fixture(autouse=True)
+    def clean_cache(self):
+        token_cache.clear()
+        yield
+        token_cache.clear()
+
+    def test_01_cache_hits(self, user, monkeypatch):
+        verifications = []
+        original = authentication.JWTAuthentication.get_validated_token
+
+        def get_validated_token(self, raw_token):
+            verifications.append(raw_token)
+            return original(self, raw_token)
+
+        monkeypatch.setattr(
+            authentication.JWTAuthentication, 'get_validated_token',
+            get_validated_token,
+        )
+        client = get_client(user)
+        for _ in range(5):
+            assert client.get('/api/v1/users/me/').status_code == 200
+
+        assert len(verifications) == 1, (
+            'Проверьте, что подпись повторно используемого токена '
+            'проверяется один раз.'
+        )
+        stats = token_cache.stats()
+        assert stats['hits'] == 4 and stats['misses'] == 1
+        assert stats['hit_rate'] == 0.8
+
+    def test_02_revoked_token_from_cache(self, user):
+        client = get_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        user.revoke_tokens()
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что кэш токенов не отменяет проверку версии токенов.'
+        )
+
+    def test_03_expired_token(self, user, monkeypatch):
+        token = ClaimsAccessToken.for_user(user)
+        client = get_token_client(token)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        monkeypatch.setattr(
+            time, 'time', lambda now=time.time(): now + 10 ** 7
+        )
+        assert token_cache.get(str(token)) is None, (
+            'Проверьте, что кэш не возвращает токены с истёкшим сроком.'
+        )
+
+    def test_04_lru_eviction(self):
+        cache = TokenCache(2)
+        expires = {'exp': time.time() + 60}
+        for raw_token in ('a', 'b'):
+            cache.set(raw_token, expires)
+        assert cache.get('a') is expires
+        cache.set('c', expires)
+        assert cache.get('b') is None, (
+            'Проверьте, что кэш вытесняет давно не использованные токены.'
+        )
+        assert cache.get('a') is expires and cache.get('c') is expires
+        assert cache.stats()['size'] == 2
+
+    def test_05_invalid_token_not_cached(self):
+        client = get_token_client('invalid')
+        assert client.get('/api/v1/users/me/').status_code == 401
+        assert token_cache.stats()['size'] == 0
+        with pytest.raises(InvalidToken):
+            authentication.StatelessJWTAuthentication().get_validated_token(
+                b'invalid'
+            )
+
+    def test_06_benchmark(self, capsys):
+        call_command('benchmark_auth', '--repeat', '5')
+        output = capsys.readouterr().out
+        assert 'без кэша' in output and 'с кэшем' in output
+        assert token_cache.maxsize > 0
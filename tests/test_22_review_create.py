@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title
+from tests.utils import get_client
+
+DUPLICATE_ERROR = {
+    'non_field_errors': ['Вы уже оставляли отзыв на это произведение.']
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22ReviewCreate:
+
+    def test_01_single_insert(self, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        client = get_client(user)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, {'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+        review_queries = [
+            query['sql'] for query in context.captured_queries
+            if '"reviews_review"' in query['sql']
+        ]
+        assert len(review_queries) == 1 and review_queries[0].startswith(
+            'INSERT'
+        ), (
+            'Проверьте, что при создании отзыва таблица отзывов не читается '
+            'перед вставкой: повторные отзывы отклоняет ограничение '
+            '`reviews_review_unique_review`.'
+        )
+
+    def test_02_duplicate_review(self, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        client = get_client(user)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        assert client.post(url, {'text': 'Отзыв', 'score': 5}).status_code == 201
+        response = client.post(url, {'text': 'Ещё отзыв', 'score': 1})
+        assert response.status_code == 400
+        assert response.json() == DUPLICATE_ERROR, (
+            'Проверьте, что повторный отзыв возвращает ошибку 400 с '
+            'сообщением о повторном отзыве.'
+        )
+        title.refresh_from_db()
+        assert title.score_count == 1 and title.rating == 5
+
+    def test_03_parallel_duplicates(self, user, monkeypatch):
+        """
+        Все запросы доходят до вставки отзыва, пока ни один из них не
+        вставил его, - как при одновременной отправке формы. Тестовая база
+        SQLite в памяти не ждёт снятия блокировок, поэтому сами обращения к
+        базе выполняются по очереди.
+        """
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        clients = [get_client(user) for _ in range(8)]
+        barrier = threading.Barrier(len(clients))
+        database_lock = threading.Lock()
+        original_save = Review.save
+
+        def save(review, *args, **kwargs):
+            database_lock.release()
+            barrier.wait()
+            database_lock.acquire()
+            return original_save(review, *args, **kwargs)
+
+        monkeypatch.setattr(Review, 'save', save)
+        responses = []
+
+        def post(client):
+            with database_lock:
+                responses.append(
+                    client.post(url, {'text': 'Отзыв', 'score': 7})
+                )
+            connections.close_all()
+
+        threads = [
+            threading.Thread(target=post, args=(client,))
+            for client in clients
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        statuses = sorted(response.status_code for response in responses)
+        assert statuses == [201] + [400] * (len(clients) - 1), (
+            'Проверьте, что из одновременных одинаковых запросов создаётся '
+            'ровно один отзыв, а остальные получают ошибку 400.'
+        )
+        assert all(
+            response.json() == DUPLICATE_ERROR
+            for response in responses if response.status_code == 400
+        )
+        assert Review.objects.filter(title=title).count() == 1
+        title.refresh_from_db()
+        assert title.score_count == 1 and title.rating == 7
@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from api.v1.views import CommentViewSet, ReviewViewSet
+from reviews.models import Review, Title
+
+
+def parent_queries(context, table):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+        and f'FROM "{table}"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23ParentObjects:
+
+    @pytest.fixture
+    def review(self, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        return Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+
+    def test_01_comment_create_single_lookup(self, user_client, review):
+        url = (
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, {'text': 'Комментарий'})
+        assert response.status_code == 201
+        assert len(parent_queries(context, 'reviews_review')) == 1, (
+            'Проверьте, что отзыв загружается один раз за запрос.'
+        )
+
+    def test_02_review_create_single_lookup(self, moderator_client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = moderator_client.post(
+                url, {'text': 'Отзыв', 'score': 3}
+            )
+        assert response.status_code == 201
+        assert len(parent_queries(context, 'reviews_title')) == 1, (
+            'Проверьте, что произведение загружается один раз за запрос.'
+        )
+
+    def test_03_serializer_context(self, review, django_assert_num_queries):
+        request = APIRequestFactory().get('/')
+        for viewset, name, kwargs, parent in (
+            (ReviewViewSet, 'title', {'title_id': review.title_id},
+             review.title),
+            (CommentViewSet, 'review', {
+                'title_id': review.title_id, 'review_id': review.id
+            }, review),
+        ):
+            view = viewset(kwargs=kwargs, request=request, format_kwarg=None)
+            with django_assert_num_queries(1):
+                context = view.get_serializer_context()
+                assert context[name] == parent, (
+                    'Проверьте, что родительский объект передаётся в '
+                    'контекст сериализатора.'
+                )
+                assert view.get_parent(name) is view.get_parent(name)
+
+    def test_04_parent_not_found(self, user_client, review):
+        other = Title.objects.create(name='Другое', year=2001)
+        assert user_client.get(
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/'
+        ).status_code == 404, (
+            'Проверьте, что комментарии отзыва доступны только по адресу '
+            'его произведения.'
+        )
+        assert user_client.get(
+            f'/api/v1/titles/{other.id + 1}/reviews/'
+        ).status_code == 404
@@ -0,0 +1,56 @@
+import pytest
+from rest_framework.pagination import PageNumberPagination
+
+from reviews.models import Comment, Review, Title, User
+
+
+def create_reviews(size):
+    title = Title.objects.create(name='Произведение', year=2000)
+    User.objects.bulk_create(
+        User(username=f'author{idx}', email=f'author{idx}@yamdb.fake')
+        for idx in range(size)
+    )
+    authors = list(User.objects.filter(username__startswith='author'))
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text='Отзыв', score=5)
+        for author in authors
+    )
+    review = Review.objects.filter(title=title).first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=author, text='Комментарий')
+        for author in authors
+    )
+    return title, review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24ReviewQueries:
+
+    # Родительский объект, COUNT(*), страница с авторами.
+    EXPECTED_QUERIES = 3
+
+    @pytest.mark.parametrize('page_size', (10, 100, 1000))
+    def test_01_nested_list_query_budget(self, client, monkeypatch,
+                                         django_assert_num_queries,
+                                         page_size):
+        title, review = create_reviews(page_size)
+        monkeypatch.setattr(PageNumberPagination, 'page_size', page_size)
+
+        for url in (
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+        ):
+            with django_assert_num_queries(self.EXPECTED_QUERIES):
+                response = client.get(url)
+
+            results = response.json()['results']
+            assert len(results) == page_size, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает полную '
+                'страницу.'
+            )
+            assert all(
+                item['author'].startswith('author') for item in results
+            ), (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'автора каждой записи.'
+            )
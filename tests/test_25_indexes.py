@@ -0,0 +1,98 @@
+import pytest
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+
+from reviews.models import Comment, Genre, Review, Title, TitleGenre
+from tests.utils import create_catalog
+
+
+def get_unique_index(model, columns):
+    """
+    Имя уникального индекса SQLite по колонкам. Уникальное ограничение,
+    созданное при пересборке таблицы, SQLite хранит как автоиндекс.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        for _, name, unique, *_ in cursor.execute(
+            f'PRAGMA index_list("{table}")'
+        ).fetchall():
+            index_columns = [
+                column for *_, column in cursor.execute(
+                    f'PRAGMA index_info("{name}")'
+                ).fetchall()
+            ]
+            if unique and index_columns == columns:
+                return name
+    return None
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Indexes:
+
+    def test_01_hot_queries_use_indexes(self, user):
+        create_catalog(20)
+        title = Title.objects.first()
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        Comment.objects.create(review=review, author=user, text='Текст')
+        page = list(Title.objects.values_list('id', flat=True)[:10])
+        queries = (
+            (title.reviews.select_related('author'),
+             'review_title_pub_date_idx'),
+            (review.comments.order_by('-pub_date'),
+             'comment_review_pub_date_idx'),
+            (Title.objects.filter(category__slug=title.category.slug),
+             'title_category_name_idx'),
+            (Title.objects.filter(year=2000), 'title_year_idx'),
+            (Genre.objects.filter(title__in=page),
+             get_unique_index(TitleGenre, ['title_id', 'genre_id'])),
+        )
+        for queryset, index in queries:
+            assert index is not None, (
+                'Проверьте, что пара произведение-жанр уникальна.'
+            )
+            plan = queryset.explain()
+            assert index in plan, (
+                f'Проверьте, что запрос `{queryset.query}` использует индекс '
+                f'`{index}`. План запроса: {plan}'
+            )
+
+    def test_02_title_genre_unique(self):
+        create_catalog(1)
+        link = TitleGenre.objects.first()
+        with pytest.raises(IntegrityError):
+            TitleGenre.objects.create(title=link.title, genre=link.genre)
+
+    def test_03_migration_removes_duplicates(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('reviews', '0013_user_token_version')])
+        apps = executor.loader.project_state(
+            ('reviews', '0013_user_token_version')
+        ).apps
+        OldTitleGenre = apps.get_model('reviews', 'TitleGenre')
+        title = apps.get_model('reviews', 'Title').objects.create(
+            name='Произведение', year=2000
+        )
+        genres = [
+            apps.get_model('reviews', 'Genre').objects.create(
+                name=f'Жанр {idx}', slug=f'genre-{idx}'
+            )
+            for idx in range(2)
+        ]
+        for genre in (*genres, genres[0], genres[0], None):
+            OldTitleGenre.objects.create(title=title, genre=genre)
+        OldTitleGenre.objects.create(title=None, genre=genres[1])
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+        links = TitleGenre.objects.filter(title_id=title.id)
+        assert sorted(links.values_list('genre__slug', flat=True)) == [
+            'genre-0', 'genre-1'
+        ], (
+            'Проверьте, что миграция удаляет повторяющиеся связи и связи '
+            'без произведения или жанра.'
+        )
+        assert TitleGenre.objects.count() == 2
+        assert Genre.objects.count() == 2
@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+
+from api.sqlite import apply_pragmas
+
+
+def read_pragma(cursor, name):
+    cursor.execute(f'PRAGMA {name}')
+    return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26SQLite:
+
+    def test_01_connection_pragmas(self):
+        connection.close()
+        with connection.cursor() as cursor:
+            assert read_pragma(cursor, 'synchronous') == 1, (
+                'Проверьте, что новое подключение к SQLite использует '
+                '`synchronous = NORMAL`.'
+            )
+            assert read_pragma(cursor, 'busy_timeout') == 5000
+            assert read_pragma(cursor, 'cache_size') == -64 * 1024
+        assert settings.DATABASES['default']['CONN_MAX_AGE'] > 0, (
+            'Проверьте, что подключения к базе переиспользуются между '
+            'запросами.'
+        )
+
+    def test_02_wal_mode(self, tmp_path):
+        database = sqlite3.connect(tmp_path / 'db.sqlite3')
+        apply_pragmas(database, settings.SQLITE_PRAGMAS)
+        cursor = database.cursor()
+        assert read_pragma(cursor, 'journal_mode') == 'wal', (
+            'Проверьте, что файл базы SQLite переводится в режим WAL.'
+        )
+        assert read_pragma(cursor, 'mmap_size') == 256 * 1024 * 1024
+        database.close()
+
+    def test_03_benchmark(self, capsys):
+        call_command(
+            'benchmark_sqlite', '--duration', '0.2', '--rows', '100',
+            '--readers', '1', '--writers', '1',
+        )
+        output = capsys.readouterr().out
+        assert 'по умолчанию, запись' in output
+        assert 'SQLITE_PRAGMAS, чтение' in output
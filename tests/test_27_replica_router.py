@@ -0,0 +1,131 @@
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Title
+from tests.utils import create_catalog
+
+REPLICA = 'replica'
+
+
+@pytest.fixture
+def replica(tmp_path, settings):
+    connections.databases[REPLICA] = {
+        **connections.databases['default'],
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+        'TEST': {},
+    }
+    settings.DATABASE_REPLICAS = [REPLICA]
+    call_command('replicate_sqlite', '--once')
+    yield
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27ReplicaRouter:
+
+    CATEGORIES_URL = '/api/v1/categories/'
+
+    def test_01_reads_from_replica(self, replica, client):
+        create_catalog(3)
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что GET-запросы читают данные из реплики.'
+        )
+        call_command('replicate_sqlite', '--once')
+        assert client.get('/api/v1/titles/').json()['count'] == 3
+
+    def test_02_read_your_writes(self, admin_client, replica, settings):
+        response = admin_client.post(
+            self.CATEGORIES_URL, {'name': 'Фильм', 'slug': 'film'}
+        )
+        assert response.status_code == 201
+        assert Category.objects.filter(slug='film').exists()
+
+        assert admin_client.get(
+            self.CATEGORIES_URL
+        ).json()['count'] == 1, (
+            'Проверьте, что после записи клиент читает из основной базы.'
+        )
+        assert APIClient().get(self.CATEGORIES_URL).json()['count'] == 0, (
+            'Проверьте, что другие клиенты продолжают читать из реплики.'
+        )
+
+        settings.REPLICA_PIN_SECONDS = 0
+        admin_client.post(
+            self.CATEGORIES_URL, {'name': 'Книга', 'slug': 'book'}
+        )
+        admin_client.cookies.clear()
+        assert admin_client.get(
+            self.CATEGORIES_URL
+        ).json()['count'] == 0, (
+            'Проверьте, что после `REPLICA_PIN_SECONDS` клиент снова читает '
+            'из реплики.'
+        )
+
+    def test_03_signup_then_token(self, replica):
+        client = APIClient()
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'replicated', 'email': 'replicated@yamdb.fake',
+        })
+        assert response.status_code == 200
+        response = client.post('/api/v1/auth/token/', {
+            'username': 'replicated', 'confirmation_code': 'wrong',
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что клиент без токена после записи читает из '
+            'основной базы (cookie).'
+        )
+        response = APIClient().post('/api/v1/auth/token/', {
+            'username': 'replicated', 'confirmation_code': 'wrong',
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что запросы на запись читают из основной базы.'
+        )
+
+    def test_04_write_request_reads_primary(self, replica, admin_client,
+                                            user_client):
+        create_catalog(1)
+        call_command('replicate_sqlite', '--once')
+        title = Title.objects.get()
+        url = f'/api/v1/titles/{title.id}/'
+        response = user_client.post(
+            f'{url}reviews/', {'text': 'Отзыв', 'score': 9}
+        )
+        assert response.status_code == 201
+        response = admin_client.patch(url, {'name': 'Новое название'})
+        assert response.status_code == 200
+        title.refresh_from_db()
+        assert (title.name, title.score_sum, title.score_count) == (
+            'Новое название', 9, 1
+        ), (
+            'Проверьте, что изменение произведения не перезаписывает рейтинг '
+            'данными из отстающей реплики.'
+        )
+        assert title.rating == 9
+
+    def test_05_pin_in_shared_cache(self, replica, admin_client, settings,
+                                    tmp_path):
+        pins = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path / 'pins'),
+        }
+        settings.CACHES = {**settings.CACHES, 'replica_pins': pins}
+        admin_client.post(
+            self.CATEGORIES_URL, {'name': 'Фильм', 'slug': 'film'}
+        )
+        admin_client.cookies.clear()
+
+        # Другой процесс: свой кэш в памяти, тот же общий кэш меток.
+        settings.CACHES = {**settings.CACHES, 'replica_pins': {**pins}}
+        caches['default'].clear()
+        assert admin_client.get(
+            self.CATEGORIES_URL
+        ).json()['count'] == 1, (
+            'Проверьте, что метка чтения из основной базы хранится в кэше '
+            '`REPLICA_PIN_CACHE_ALIAS` и видна другим процессам.'
+        )
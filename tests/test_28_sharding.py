@@ -0,0 +1,217 @@
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, connections, transaction
+
+from reviews.models import Comment, Review, Title, User
+from reviews.sharding import get_title_shard
+
+SHARDS = ('default', 'shard1', 'shard2')
+
+
+def locate(model, pk):
+    return [
+        alias for alias in SHARDS
+        if model.objects.using(alias).filter(pk=pk).exists()
+    ]
+
+
+@pytest.fixture
+def shards(tmp_path, settings):
+    extra = [alias for alias in SHARDS if alias != 'default']
+    for alias in extra:
+        connections.databases[alias] = {
+            **connections.databases['default'],
+            'NAME': str(tmp_path / f'{alias}.sqlite3'),
+            'TEST': {},
+        }
+        call_command('migrate', database=alias, verbosity=0)
+    settings.REVIEW_SHARDS = list(SHARDS)
+    yield
+    for alias in extra:
+        connections[alias].close()
+        del connections[alias]
+        del connections.databases[alias]
+
+
+@pytest.fixture
+def titles():
+    return [
+        Title.objects.create(name=f'Произведение {idx}', year=2000)
+        for idx in range(len(SHARDS))
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28Sharding:
+
+    def test_01_reviews_and_comments_in_title_shard(self, shards, titles,
+                                                    user_client,
+                                                    moderator_client):
+        for title in titles:
+            url = f'/api/v1/titles/{title.id}/reviews/'
+            response = user_client.post(url, {'text': 'Отзыв', 'score': 4})
+            assert response.status_code == 201
+            moderator_client.post(url, {'text': 'Отзыв', 'score': 8})
+            review_id = response.json()['id']
+            assert locate(Review, review_id) == [get_title_shard(title.id)], (
+                'Проверьте, что отзыв сохраняется в шарде его произведения.'
+            )
+            comments_url = f'{url}{review_id}/comments/'
+            response = moderator_client.post(
+                comments_url, {'text': 'Комментарий'}
+            )
+            assert response.status_code == 201
+            assert locate(Comment, response.json()['id']) == [
+                get_title_shard(title.id)
+            ], 'Проверьте, что комментарий сохраняется в шарде отзыва.'
+
+            data = user_client.get(url).json()
+            assert data['count'] == 2
+            assert {item['author'] for item in data['results']} == {
+                'TestUser', 'TestModerator'
+            }
+            comments = user_client.get(comments_url).json()
+            assert comments['results'][0]['author'] == 'TestModerator'
+            response = user_client.get(f'{url}{review_id}/')
+            assert response.status_code == 200
+            assert user_client.get(
+                f'/api/v1/titles/{title.id}/'
+            ).json()['rating'] == 6, (
+                'Проверьте, что рейтинг учитывает отзывы из шарда.'
+            )
+
+        review_ids = set(Review.objects.using('shard1').values_list(
+            'id', flat=True
+        )) | set(Review.objects.using('shard2').values_list('id', flat=True))
+        assert len(review_ids) == 4, (
+            'Проверьте, что id отзывов не повторяются в разных шардах.'
+        )
+
+    def test_02_duplicate_review(self, shards, titles, user_client):
+        url = f'/api/v1/titles/{titles[1].id}/reviews/'
+        assert user_client.post(
+            url, {'text': 'Отзыв', 'score': 5}
+        ).status_code == 201
+        response = user_client.post(url, {'text': 'Ещё отзыв', 'score': 5})
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв отклоняется и в шарде.'
+        )
+
+    def test_03_edit_and_delete(self, shards, titles, user_client):
+        title = titles[2]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review_id = user_client.post(
+            url, {'text': 'Отзыв', 'score': 5}
+        ).json()['id']
+        response = user_client.patch(f'{url}{review_id}/', {'score': 9})
+        assert response.status_code == 200
+        title.refresh_from_db()
+        assert title.rating == 9
+        user_client.post(
+            f'{url}{review_id}/comments/', {'text': 'Комментарий'}
+        )
+        response = user_client.delete(f'{url}{review_id}/')
+        assert response.status_code == 204
+        assert not locate(Review, review_id)
+        assert not Comment.objects.using(get_title_shard(title.id)).exists()
+        title.refresh_from_db()
+        assert title.rating is None
+
+    def test_04_cascade_delete(self, shards, titles, user, moderator):
+        for title in titles:
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=5
+            )
+            review = Review.objects.create(
+                title=title, author=moderator, text='Отзыв', score=7
+            )
+            Comment.objects.create(
+                review=review, author=user, text='Комментарий'
+            )
+        User.objects.filter(pk=user.pk).delete()
+        for title in titles:
+            shard = get_title_shard(title.id)
+            assert not Review.objects.using(shard).filter(
+                author_id=user.pk
+            ).exists(), (
+                'Проверьте, что отзывы удалённого пользователя удаляются '
+                'из всех шардов.'
+            )
+            assert not Comment.objects.using(shard).exists()
+            title.refresh_from_db()
+            assert title.rating == 7
+
+        for title in titles:
+            title.delete()
+        for alias in SHARDS:
+            assert not Review.objects.using(alias).exists(), (
+                'Проверьте, что отзывы удалённого произведения удаляются '
+                'из его шарда.'
+            )
+
+    def test_05_rebalance(self, shards, titles, user, moderator, settings,
+                          user_client):
+        settings.REVIEW_SHARDS = []
+        reviews = [
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score
+            )
+            for title in titles
+            for author, score in ((user, 3), (moderator, 6))
+        ]
+        comments = [
+            Comment.objects.create(
+                review=review, author=user, text='Комментарий'
+            )
+            for review in reviews
+        ]
+        ratings = dict(Title.objects.values_list('id', 'rating'))
+
+        settings.REVIEW_SHARDS = list(SHARDS)
+        call_command('rebalance_shards', '--batch-size', 2)
+        for review in reviews:
+            assert locate(Review, review.id) == [
+                get_title_shard(review.title_id)
+            ], 'Проверьте, что rebalance_shards переносит отзывы в их шарды.'
+        for comment in comments:
+            assert locate(Comment, comment.id) == [
+                get_title_shard(comment.review.title_id)
+            ], 'Проверьте, что комментарии переносятся вместе с отзывами.'
+        assert dict(Title.objects.values_list('id', 'rating')) == ratings, (
+            'Проверьте, что перенос отзывов не меняет рейтинги.'
+        )
+
+        settings.REVIEW_SHARDS = ['shard2', 'shard1']
+        call_command('rebalance_shards')
+        for review in reviews:
+            assert locate(Review, review.id) == [
+                get_title_shard(review.title_id)
+            ], 'Проверьте, что отзывы переносятся при изменении REVIEW_SHARDS.'
+        call_command('recalculate_ratings')
+        assert dict(Title.objects.values_list('id', 'rating')) == ratings
+
+        title = titles[0]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        assert user_client.get(url).json()['count'] == 2
+        Review.objects.filter(title=title, author=user).delete()
+        response = user_client.post(url, {'text': 'Отзыв', 'score': 9})
+        assert response.status_code == 201
+        assert response.json()['id'] > max(review.id for review in reviews), (
+            'Проверьте, что новые отзывы получают id, не занятые в шардах.'
+        )
+
+    def test_06_constraints_kept_in_default(self, shards, titles, user):
+        with pytest.raises(IntegrityError):
+            with transaction.atomic():
+                Review.objects.using('default').create(
+                    title_id=999999, author=user, text='Отзыв', score=5
+                )
+        assert not Review.objects.using('default').exists(), (
+            'Проверьте, что основная база сохраняет внешние ключи отзывов.'
+        )
+        Review.objects.using('shard1').create(
+            title=titles[1], author=user, text='Отзыв', score=5
+        )
+        assert Review.objects.using('shard1').count() == 1, (
+            'Проверьте, что в шардах внешние ключи на основную базу удалены.'
+        )
@@ -0,0 +1,142 @@
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import AsyncClient
+
+from api.v1 import async_views
+from api.v1.authentication import ClaimsAccessToken
+from reviews.models import Category, Comment, Review, Title
+from tests.utils import create_catalog
+
+
+@pytest.fixture(autouse=True)
+def async_read(settings):
+    settings.ASYNC_READ_URLCONF = 'api_yamdb.async_urls'
+
+
+@pytest.fixture
+def review(user):
+    create_catalog(25)
+    title = Title.objects.first()
+    review = Review.objects.create(
+        title=title, author=user, text='Отзыв', score=5
+    )
+    Comment.objects.create(review=review, author=user, text='Комментарий')
+    return review
+
+
+def async_get(url, **headers):
+    return async_to_sync(AsyncClient().get)(url, **headers)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29AsyncViews:
+
+    def test_01_same_responses(self, client, review, settings):
+        # Иначе ответ ASGI приложения пришёл бы из кэша синхронного.
+        settings.RESPONSE_CACHE_ENABLED = False
+        title_url = f'/api/v1/titles/{review.title_id}/'
+        review_url = f'{title_url}reviews/{review.id}/'
+        for url in (
+            '/api/v1/titles/',
+            '/api/v1/titles/?page=2',
+            '/api/v1/titles/?page=last',
+            '/api/v1/titles/?page=9',
+            '/api/v1/titles/?page=abc',
+            '/api/v1/titles/?genre=genre-1&year=2000',
+            '/api/v1/titles/?year=abc',
+            title_url,
+            '/api/v1/titles/0/',
+            '/api/v1/genres/?search=1',
+            '/api/v1/categories/',
+            f'{title_url}reviews/',
+            '/api/v1/titles/0/reviews/',
+            review_url,
+            f'{review_url}comments/',
+            f'{review_url}comments/?cursor=',
+            f'/api/v1/titles/0/reviews/{review.id}/comments/',
+        ):
+            expected = client.get(url)
+            response = async_get(url)
+            assert (response.status_code, response.content) == (
+                expected.status_code, expected.content
+            ), (
+                f'Проверьте, что ответ ASGI приложения на GET-запрос к '
+                f'`{url}` совпадает с ответом вьюсета.'
+            )
+
+    def test_02_independent_queries_run_concurrently(self, review,
+                                                     monkeypatch):
+        # Оба запроса должны дойти до барьера одновременно, иначе он
+        # сломается по таймауту.
+        barrier = threading.Barrier(2, timeout=5)
+        database_call = async_views.database_call
+        called = []
+
+        def concurrent_call(func):
+            if func.__name__ == 'initial':
+                return database_call(func)
+
+            def call(*args, **kwargs):
+                called.append(func.__name__)
+                barrier.wait()
+                return func(*args, **kwargs)
+            return database_call(call)
+
+        monkeypatch.setattr(async_views, 'database_call', concurrent_call)
+        for url, names in (
+            ('/api/v1/titles/', ['count', 'get_page_objects']),
+            (
+                f'/api/v1/titles/{review.title_id}/',
+                ['get_object_or_404', 'list'],
+            ),
+        ):
+            called.clear()
+            response = async_get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что независимые запросы к базе для `{url}` '
+                'выполняются одновременно.'
+            )
+            assert sorted(called) == names
+
+    def test_03_writes_use_viewsets(self, admin):
+        token = ClaimsAccessToken.for_user(admin)
+        response = async_to_sync(AsyncClient().post)(
+            '/api/v1/categories/', {'name': 'Фильм', 'slug': 'film'},
+            content_type='application/json',
+            authorization=f'Bearer {token}',
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что запросы на запись в ASGI приложении обрабатывают '
+            'вьюсеты DRF.'
+        )
+        assert Category.objects.filter(slug='film').exists()
+        response = async_get(
+            '/api/v1/categories/', authorization=f'Bearer {token}'
+        )
+        assert response.json()['count'] == 1
+
+    def test_04_benchmark(self, review, capsys):
+        call_command('benchmark_asgi', requests=20, concurrency=5)
+        output = capsys.readouterr().out
+        for name in ('WSGI', 'ASGI'):
+            assert f'{name}: ' in output, (
+                'Проверьте, что команда `benchmark_asgi` выводит '
+                f'пропускную способность {name} приложения.'
+            )
+        assert 'ошибок 0' in output
+
+    def test_05_disabled_by_default(self, review, settings, monkeypatch):
+        settings.ASYNC_READ_URLCONF = None
+
+        async def dispatch(*args, **kwargs):
+            raise AssertionError
+
+        monkeypatch.setattr(async_views.AsyncReadView, 'dispatch', dispatch)
+        response = async_get('/api/v1/titles/')
+        assert response.status_code == 200, (
+            'Проверьте, что по умолчанию ASGI приложение обрабатывает чтение '
+            'вьюсетами DRF.'
+        )
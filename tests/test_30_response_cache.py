@@ -0,0 +1,188 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from api import middleware
+from reviews.models import Review, Title
+from tests.utils import create_catalog
+
+BACKENDS = {
+    'locmem': lambda tmp_path: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test-responses',
+    },
+    'file': lambda tmp_path: {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path / 'responses'),
+    },
+    'db': lambda tmp_path: {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'response_cache',
+    },
+}
+
+
+def use_cache(settings, config):
+    """Новые настройки кэша - как в только что запущенном процессе."""
+    settings.RESPONSE_CACHE_ENABLED = True
+    settings.CACHES = {**settings.CACHES, 'responses': dict(config)}
+    if config['BACKEND'].endswith('DatabaseCache'):
+        call_command('createcachetable', verbosity=0)
+
+
+@pytest.fixture(params=list(BACKENDS))
+def response_cache(request, settings, tmp_path):
+    config = BACKENDS[request.param](tmp_path)
+    use_cache(settings, config)
+    return config
+
+
+def get(url, client=None):
+    response = (client or Client()).get(url)
+    assert response.status_code == 200
+    return response
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30ResponseCache:
+
+    def test_01_anonymous_get_cached(self, response_cache):
+        create_catalog(5)
+        for url in (
+            '/api/v1/titles/', '/api/v1/titles/?year=2000',
+            '/api/v1/genres/', '/api/v1/categories/',
+        ):
+            first = get(url)
+            assert first['X-Response-Cache'] == 'miss'
+            with CaptureQueriesContext(connection) as queries:
+                second = get(url)
+            assert second['X-Response-Cache'] == 'hit', (
+                f'Проверьте, что повторный анонимный GET-запрос к `{url}` '
+                'отдаётся из кэша.'
+            )
+            assert (second.content, second['Content-Type']) == (
+                first.content, first['Content-Type']
+            )
+            assert not [
+                query for query in queries.captured_queries
+                if 'reviews_' in query['sql']
+            ], 'Проверьте, что ответ из кэша не обращается к таблицам API.'
+        assert get('/api/v1/titles/?year=1999').json()['count'] == 0, (
+            'Проверьте, что параметры запроса входят в ключ кэша.'
+        )
+
+    def test_02_invalidated_on_changes(self, response_cache, admin_client,
+                                       user_client):
+        create_catalog(2)
+        title = Title.objects.order_by('id').first()
+        titles_url = '/api/v1/titles/'
+        title_url = f'{titles_url}{title.id}/'
+        reviews_url = f'{title_url}reviews/'
+        for url in (titles_url, title_url, reviews_url, '/api/v1/genres/',
+                    '/api/v1/categories/'):
+            get(url)
+
+        admin_client.post(
+            '/api/v1/categories/', {'name': 'Фильм', 'slug': 'film'}
+        )
+        assert get('/api/v1/categories/').json()['count'] == 4, (
+            'Проверьте, что новая категория сбрасывает кэш категорий.'
+        )
+        admin_client.post(
+            '/api/v1/genres/', {'name': 'Драма', 'slug': 'drama'}
+        )
+        assert get('/api/v1/genres/').json()['count'] == 4, (
+            'Проверьте, что новый жанр сбрасывает кэш жанров.'
+        )
+        admin_client.patch(title_url, {'genre': ['drama']})
+        assert [
+            genre['slug'] for genre in get(title_url).json()['genre']
+        ] == ['drama'], (
+            'Проверьте, что изменение жанров произведения сбрасывает кэш.'
+        )
+        admin_client.delete('/api/v1/genres/drama/')
+        assert get(title_url).json()['genre'] == []
+
+        response = user_client.post(reviews_url, {'text': 'Отзыв', 'score': 8})
+        review_id = response.json()['id']
+        assert get(reviews_url).json()['count'] == 1, (
+            'Проверьте, что новый отзыв сбрасывает кэш отзывов.'
+        )
+        assert get(title_url).json()['rating'] == 8, (
+            'Проверьте, что новый отзыв сбрасывает кэш рейтинга произведения.'
+        )
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        assert get(comments_url).json()['count'] == 0
+        user_client.post(comments_url, {'text': 'Комментарий'})
+        assert get(comments_url).json()['count'] == 1, (
+            'Проверьте, что новый комментарий сбрасывает кэш комментариев.'
+        )
+
+        Review.objects.get(pk=review_id).delete()
+        assert get(reviews_url).json()['count'] == 0
+        assert get(title_url).json()['rating'] is None
+        title.delete()
+        assert Client().get(title_url).status_code == 404, (
+            'Проверьте, что удаление произведения сбрасывает кэш.'
+        )
+        assert get(titles_url).json()['count'] == 1
+
+    def test_03_authenticated_not_cached(self, response_cache, user_client):
+        create_catalog(1)
+        for _ in range(2):
+            response = get('/api/v1/titles/', user_client)
+            assert not response.has_header('X-Response-Cache'), (
+                'Проверьте, что запросы с токеном не кэшируются.'
+            )
+        response = Client().get(
+            '/api/v1/titles/', HTTP_AUTHORIZATION='Bearer invalid'
+        )
+        assert response.status_code == 401
+
+    @pytest.mark.parametrize('backend', ['file', 'db'])
+    def test_04_shared_cache(self, backend, settings, tmp_path, user):
+        config = BACKENDS[backend](tmp_path)
+        use_cache(settings, config)
+        create_catalog(1)
+        title = Title.objects.get()
+        url = f'/api/v1/titles/{title.id}/'
+        get(url)
+
+        # Другой процесс с тем же общим кэшем.
+        use_cache(settings, {**config})
+        assert get(url)['X-Response-Cache'] == 'hit', (
+            'Проверьте, что процессы с общим кэшем используют одни ответы.'
+        )
+        Review.objects.create(title=title, author=user, text='Отзыв', score=3)
+
+        use_cache(settings, {**config})
+        response = get(url)
+        assert (response['X-Response-Cache'], response.json()['rating']) == (
+            'miss', 3
+        ), 'Проверьте, что изменения сбрасывают кэш во всех процессах.'
+
+    def test_05_disabled_by_default(self):
+        create_catalog(1)
+        for _ in range(2):
+            assert not get('/api/v1/titles/').has_header('X-Response-Cache'), (
+                'Проверьте, что кэш ответов по умолчанию выключен.'
+            )
+
+    def test_06_benchmarks_bypass_cache(self, response_cache, monkeypatch,
+                                        capsys):
+        call_command(
+            'generate_data', users=5, titles=5, reviews=10, comments=5
+        )
+        stored = []
+        monkeypatch.setattr(
+            middleware, 'store_response', lambda *args: stored.append(args)
+        )
+        call_command('benchmark_api', repeat=2)
+        call_command('benchmark_asgi', requests=10, concurrency=2)
+        assert not stored, (
+            'Проверьте, что `benchmark_api` и `benchmark_asgi` замеряют '
+            'запросы без кэша ответов.'
+        )
+        assert 'title_detail: p50' in capsys.readouterr().out
@@ -1,5 +1,10 @@
 from http import HTTPStatus
 
+from rest_framework.test import APIClient
+
+from api.v1.authentication import ClaimsAccessToken
+from reviews.models import Category, Genre, Title, TitleGenre
+
 
 check_name_and_slug_patterns = (
     (
@@ -305,3 +310,38 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def create_catalog(size):
+    Category.objects.bulk_create(
+        Category(name=f'Категория {idx}', slug=f'category-{idx}')
+        for idx in range(3)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {idx}', slug=f'genre-{idx}') for idx in range(3)
+    )
+    categories = list(Category.objects.all())
+    genres = list(Genre.objects.all())
+    Title.objects.bulk_create(
+        Title(
+            name=f'Произведение {idx:04}',
+            year=2000,
+            category=categories[idx % len(categories)],
+        )
+        for idx in range(size)
+    )
+    TitleGenre.objects.bulk_create(
+        TitleGenre(title=title, genre=genre)
+        for title in Title.objects.all()
+        for genre in genres[:2]
+    )
+
+
+def get_token_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def get_client(user):
+    return get_token_client(ClaimsAccessToken.for_user(user))